@@ -1,6 +1,11 @@
-from superlinked import framework as sl
+import argparse
+import time
+
 from superlinked_app import index
+from superlinked_app.ingestion import peak_rss_mb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 from loguru import logger
 import os
@@ -9,31 +14,105 @@ ROOT_DIR = Path(__file__).parent
 ENV_FILE = ROOT_DIR / ".env"
 logger.info("Loading environment variables from .env file: %s", ENV_FILE)
 
+# Only the columns DataSchema in superlinked_app/index.py declares are read from the raw dump.
+USECOLS = list(index.DataSchema.__annotations__)
+
+# Raw dtypes as they appear in the Inside Airbnb listings.csv. `price` and
+# `host_is_superhost` arrive as strings ("$1,200.00", "t"/"f") and are converted in preprocess.
+RAW_DTYPES = {
+    "id": "int64",
+    "name": "string",
+    "description": "string",
+    "bedrooms": "float64",
+    "beds": "float64",
+    "bathrooms": "float64",
+    "bathrooms_text": "string",
+    "review_scores_rating": "float64",
+    "host_is_superhost": "string",
+    "price": "string",
+    "amenities": "string",
+    "number_of_reviews": "Int64",
+    "room_type": "string",
+    "listing_url": "string",
+}
+
+# Free-text columns; missing values become "" rather than the "nan" string DataFrameParser would produce.
+TEXT_COLUMNS = [
+    column for column, dtype in RAW_DTYPES.items() if dtype == "string" and column not in ("price", "host_is_superhost")
+]
+
+DEFAULT_CHUNKSIZE = 50_000
 
 
 class DataReader:
-    def __init__(self) -> None:
-        #self.path = os.getenv('DATA_PATH')
-        self.path = "/Users/amlk/MLOps-training/listings.csv"
+    def __init__(self, path: str | None = None, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
+        self.path = path or os.getenv("RAW_DATA_PATH", "listings.csv")
+        self.chunksize = chunksize
+        self._parquet_writer: pq.ParquetWriter | None = None
+
     def read(self):
-        data = pd.read_csv(self.path)
-        return data
-    
+        return pd.read_csv(
+            self.path,
+            usecols=USECOLS,
+            dtype=RAW_DTYPES,
+            chunksize=self.chunksize,
+        )
+
     def preprocess(self, data):
-        data['price'] = data['price'].apply(lambda x: float(x[1:].replace(',', '')) if isinstance(x, str) else x)
-        data['host_is_superhost']=data['host_is_superhost'].apply(lambda x: 1 if x == 't' else 0)
-        data['last_scraped'] = pd.to_datetime(data['last_scraped'])
-        data['review_scores_rating'].fillna(-1.0, inplace=True)
-        data['price'].fillna(-1.0, inplace=True)
+        price = data["price"].str.replace(r"[$,]", "", regex=True)
+        data["price"] = pd.to_numeric(price, errors="coerce").fillna(-1.0).astype("float64")
+        data["host_is_superhost"] = data["host_is_superhost"].eq("t").fillna(False).astype("int8")
+        data["number_of_reviews"] = data["number_of_reviews"].fillna(0).astype("int64")
+        data["review_scores_rating"] = data["review_scores_rating"].fillna(-1.0)
+        data[TEXT_COLUMNS] = data[TEXT_COLUMNS].fillna("")
         return data
 
-if __name__ == "__main__":
-    data_reader = DataReader()
-    data = data_reader.read()
-    data = data_reader.preprocess(data)
-    
-    data.to_csv('listings.csv', index=False)
+    def write(self, data, output_path: str, first_chunk: bool) -> None:
+        if Path(output_path).suffix == ".parquet":
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            if first_chunk:
+                # The dtypes are pinned in read, so the first chunk's schema holds for the whole file.
+                self._parquet_writer = pq.ParquetWriter(output_path, table.schema, compression="zstd")
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        else:
+            data.to_csv(output_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
 
+    def run(self, output_path: str) -> int:
+        """Stream the raw dump through preprocess chunk by chunk and write it to output_path.
 
+        The output format follows the file extension: `.parquet` writes a zstd-compressed Parquet file,
+        anything else writes CSV.
+        """
+        rows = 0
+        start = time.perf_counter()
+        try:
+            for chunk_number, chunk in enumerate(self.read()):
+                self.write(self.preprocess(chunk), output_path, first_chunk=chunk_number == 0)
+                rows += len(chunk)
+                logger.debug("Preprocessed chunk {} ({} rows so far)", chunk_number, rows)
+        finally:
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+                self._parquet_writer = None
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Preprocessed {} rows in {:.1f}s ({:.0f} rows/sec), peak memory {:.0f} MB",
+            rows,
+            elapsed,
+            rows / elapsed if elapsed else 0.0,
+            peak_rss_mb(),
+        )
+        return rows
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocess an Inside Airbnb listings.csv dump.")
+    parser.add_argument("input", nargs="?", default=None, help="Raw listings.csv (defaults to $RAW_DATA_PATH).")
+    parser.add_argument(
+        "output", nargs="?", default="listings.parquet", help="Where to write the preprocessed file (.parquet or .csv)."
+    )
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    data_reader = DataReader(args.input, chunksize=args.chunksize)
+    data_reader.run(args.output)
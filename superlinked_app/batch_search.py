@@ -0,0 +1,146 @@
+from collections import defaultdict
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+import superlinked.framework as sl
+from fastapi import FastAPI, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from loguru import logger
+from superlinked.framework.dsl.app.rest.rest_app import RestApp
+from superlinked.framework.dsl.query.query_clause import SimilarFilterClause
+from superlinked.framework.dsl.query.query_descriptor import QueryDescriptor
+from superlinked.framework.dsl.query.query_param_value_setter import QueryParamValueSetter
+from superlinked.framework.dsl.query.result import Result
+from superlinked.server.middleware import lifespan_event
+from superlinked.server.util.fast_api_handler import QueryResponse
+
+from superlinked_app import embedding, nlq, query
+from superlinked_app.config import setting
+
+
+def resolve_params(query_name: str, query_descriptor: QueryDescriptor, params: dict[str, Any]) -> dict[str, Any]:
+    """params with the natural query replaced by the parameters extracted from it.
+
+    Querying with the result runs the same search without parsing the natural query again.
+    """
+    token = nlq.current_query_name.set(query_name)
+    try:
+        resolved = QueryParamValueSetter.set_values(query_descriptor, params)
+    finally:
+        nlq.current_query_name.reset(token)
+    return nlq.resolved_params(resolved, params)
+
+
+def prefetch_query_embeddings(query_descriptor: QueryDescriptor, params_list: Sequence[dict[str, Any]]) -> None:
+    """Embed the texts of the .similar clauses on text spaces in one model call per model, so the searches
+    find their vectors in the query embedding cache."""
+    texts_by_model: dict[str, list[str]] = defaultdict(list)
+    for clause in query_descriptor.get_clauses_by_type(SimilarFilterClause):
+        if not isinstance(clause.space, sl.TextSimilaritySpace):
+            continue
+        model_name = clause.space.transformation_config.embedding_config.model_name
+        param_name = clause.get_param(clause.value_param).name
+        texts_by_model[model_name].extend(
+            params[param_name] for params in params_list if isinstance(params.get(param_name), str)
+        )
+    for model_name, texts in texts_by_model.items():
+        embedding.query_embedding_cache.embed(
+            model_name, list(dict.fromkeys(texts)), embedding.get_manager(model_name).embed_query_text
+        )
+
+
+def serialize(result: Result) -> dict[str, Any]:
+    """The response body FastApiHandler builds for a query, through the same QueryResponse model."""
+    return QueryResponse(
+        schema=result.schema._schema_name,
+        metadata=None,
+        results=[
+            {
+                "entity": {
+                    "id": entry.entity.header.object_id,
+                    "score": entry.entity.score,
+                    "origin": (
+                        {"id": entry.entity.header.object_id, "schema": entry.entity.header.schema_id}
+                        if entry.entity.header.origin_id
+                        else {}
+                    ),
+                },
+                "obj": entry.stored_object,
+            }
+            for entry in result.entries
+        ],
+    ).model_dump(by_alias=True, exclude_none=True)
+
+
+def _resolve(
+    query_name: str, query_descriptor: QueryDescriptor, params: dict[str, Any]
+) -> dict[str, Any] | Exception:
+    try:
+        return resolve_params(query_name, query_descriptor, params)
+    except Exception as e:
+        # A rejected param set or a failed natural query call, only this entry gets the error.
+        logger.warning("Batch {} params {} failed to resolve: {}", query_name, params, e)
+        return e
+
+
+def _search(
+    app: RestApp, query_name: str, query_descriptor: QueryDescriptor, params: dict[str, Any] | Exception
+) -> Result | Exception:
+    if isinstance(params, Exception):
+        return params
+    token = nlq.current_query_name.set(query_name)
+    try:
+        return app.query(query_descriptor, **params)
+    except Exception as e:
+        logger.warning("Batch {} search {} failed: {}", query_name, params, e)
+        return e
+    finally:
+        nlq.current_query_name.reset(token)
+
+
+def search_batch(app: RestApp, query_name: str, params_list: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+    """The responses of query_name to every param set, in order.
+
+    Natural queries are parsed concurrently, then the query texts of the whole batch are embedded
+    together, and the searches run concurrently. A param set the query rejects or fails on gets an error instead.
+    """
+    query_descriptor = query.queries_by_name[query_name]
+    with ThreadPoolExecutor(max_workers=setting.BATCH_SEARCH_WORKERS) as pool:
+        resolved = list(pool.map(partial(_resolve, query_name, query_descriptor), params_list))
+        prefetch_query_embeddings(query_descriptor, [params for params in resolved if isinstance(params, dict)])
+        results = list(pool.map(partial(_search, app, query_name, query_descriptor), resolved))
+    return [{"error": str(result)} if isinstance(result, Exception) else serialize(result) for result in results]
+
+
+def _batch_endpoint(app: RestApp, query_name: str) -> Callable:
+    async def batch_query(request: Request) -> JSONResponse:
+        payload = await request.json()
+        params_list = payload.get("queries") if isinstance(payload, dict) else None
+        if not isinstance(params_list, list) or not all(isinstance(params, dict) for params in params_list):
+            raise ValueError('The body must be {"queries": [<params>, ...]}.')
+        if len(params_list) > setting.BATCH_SEARCH_MAX_QUERIES:
+            raise ValueError(f"At most {setting.BATCH_SEARCH_MAX_QUERIES} queries fit in a batch.")
+        responses = await run_in_threadpool(search_batch, app, query_name, params_list)
+        return JSONResponse(content={"responses": responses}, status_code=status.HTTP_200_OK)
+
+    return batch_query
+
+
+_register_routes = lifespan_event._register_routes
+
+
+def _register_routes_with_batch(app: FastAPI, rest_app: RestApp) -> None:
+    _register_routes(app, rest_app)
+    for path in rest_app.handler.query_paths:
+        query_name = path.rstrip("/").rsplit("/", 1)[-1]
+        if query_name not in query.queries_by_name:
+            continue
+        app.add_api_route(path=f"{path}/batch", endpoint=_batch_endpoint(rest_app, query_name), methods=["POST"])
+        logger.info("Registered batch query endpoint {}/batch", path)
+
+
+# The server imports the app module before it registers the routes of its executors.
+lifespan_event._register_routes = _register_routes_with_batch
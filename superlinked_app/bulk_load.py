@@ -0,0 +1,171 @@
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+import superlinked.framework as sl
+from loguru import logger
+from qdrant_client.models import OptimizersConfigDiff, PointStruct
+from superlinked.framework.common.storage.entity.entity_data import EntityData
+
+from superlinked_app import embedding, index, ingestion, nlq, qdrant, query, query_log, response_cache
+from superlinked_app.config import setting
+
+
+class BulkQdrantVDBConnector(qdrant.ProvisionedQdrantVDBConnector):
+    """Fills a fresh collection without reading it back.
+
+    Superlinked writes every listing in several small write_entities calls: its object, its fields
+    and its vectors. They are merged per point here and uploaded in large batches by a pool of
+    workers when flush is called, instead of one retrieve and update round trip per call.
+    """
+
+    def __init__(self, connection_params, vdb_settings, collection_name: str, workers: int, batch_size: int) -> None:
+        super().__init__(connection_params, vdb_settings)
+        self._bulk_collection_name = collection_name
+        self._batch_size = batch_size
+        self._pending: dict[str, tuple[dict, dict]] = {}
+        self._uploads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qdrant-upload")
+        # Keeps the embedding side from queueing up more than a couple of batches per worker.
+        self._upload_slots = BoundedSemaphore(workers * 2)
+        self._futures: list[Future] = []
+        self.uploaded_points = 0
+
+    @property
+    def collection_name(self) -> str:
+        return self._bulk_collection_name
+
+    def write_entities(self, entity_data: Sequence[EntityData]) -> None:
+        for data in entity_data:
+            vectors, payload = self._pending.setdefault(self._get_qdrant_id(data.id_), ({}, {}))
+            vectors.update(self._get_point_vector_dict(data))
+            payload.update(self._get_point_payload_dict(data))
+
+    def flush(self) -> None:
+        points = [
+            PointStruct(id=point_id, vector=vectors, payload=payload)
+            for point_id, (vectors, payload) in self._pending.items()
+        ]
+        self._pending = {}
+        for start in range(0, len(points), self._batch_size):
+            self._upload_slots.acquire()
+            future = self._uploads.submit(self._upload, points[start : start + self._batch_size])
+            future.add_done_callback(lambda _: self._upload_slots.release())
+            self._futures.append(future)
+        self.uploaded_points += len(points)
+        pending = []
+        for future in self._futures:
+            if future.done():
+                # Surfaces a failed upload now rather than at the end of the load.
+                future.result()
+            else:
+                pending.append(future)
+        self._futures = pending
+
+    def _upload(self, points: list[PointStruct]) -> None:
+        self._client.upsert(self.collection_name, points=points, wait=True)
+
+    def wait(self) -> None:
+        self.flush()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        self._uploads.shutdown()
+
+
+class BulkQdrantVectorDatabase(qdrant.ProvisionedQdrantVectorDatabase):
+    def __init__(self, url: str, api_key: str, collection_name: str, workers: int, batch_size: int) -> None:
+        super().__init__(url, api_key)
+        self.connector = BulkQdrantVDBConnector(
+            self._connection_params, self._settings, collection_name, workers, batch_size
+        )
+
+    @property
+    def _vdb_connector(self) -> BulkQdrantVDBConnector:
+        return self.connector
+
+
+def smoke_test(app, queries: list[dict]) -> None:
+    """Replay logged REST queries through app to check the new collection answers them. Raises if every
+    one of them fails, which points at a broken collection.
+
+    This runs in the loader's process, so it warms no server cache. The natural query params are left out
+    of each replay, so entries logged before their params were resolved don't call the LLM again.
+    """
+    start = time.perf_counter()
+    failures = 0
+    for logged in queries:
+        query_name = logged["query_name"]
+        query_descriptor = query.queries_by_name[query_name]
+        nlq_param_names = nlq.natural_query_param_names(query_descriptor)
+        params = {name: value for name, value in logged["params"].items() if name not in nlq_param_names}
+        try:
+            app.query(query_descriptor, **params)
+        except Exception as e:
+            failures += 1
+            logger.warning("Smoke test {} query {} failed: {}", query_name, params, e)
+    if queries and failures == len(queries):
+        raise RuntimeError(f"All {failures} smoke test queries failed, not swapping the alias")
+    logger.info(
+        "Smoke tested with {} queries in {:.1f}s, {} failed", len(queries), time.perf_counter() - start, failures
+    )
+
+
+def bulk_load(path: str, batch_size: int, smoke_test_queries: int, keep_collections: int) -> str:
+    """Load path into a new collection with indexing deferred, build the index once at the end, then
+    point the QDRANT_COLLECTION_NAME alias at it. Searches keep hitting the previous collection until
+    the swap.
+
+    Before the swap, the last smoke_test_queries queries of the query log are replayed against the new
+    collection. After it, versions older than the previous collection are deleted, keeping
+    keep_collections of them. Returns the name of the new collection.
+    """
+    client = qdrant.create_client()
+    alias = qdrant.collection_name()
+    collection = qdrant.versioned_collection_name(alias)
+    qdrant.provision_collection(client, collection, qdrant.vectors_config())
+    client.update_collection(collection, optimizers_config=OptimizersConfigDiff(indexing_threshold=0))
+
+    vector_database = BulkQdrantVectorDatabase(
+        setting.QDRANT_CLUSTER_URL.get_secret_value(),
+        setting.QDRANT_API_KEY.get_secret_value(),
+        collection,
+        setting.QDRANT_BULK_UPLOAD_WORKERS,
+        setting.QDRANT_BULK_UPLOAD_BATCH_SIZE,
+    )
+    source = sl.InMemorySource(
+        index.airbnb,
+        parser=sl.DataFrameParser(schema=index.airbnb, mapping={index.airbnb.id: "id"}),
+    )
+    source.register(embedding.TextEmbeddingPrefetcher([index.description_space, index.amenities_space]))
+    app = sl.InteractiveExecutor(
+        sources=[source], indices=[index.airbnb_index], vector_database=vector_database
+    ).run()
+
+    start = time.perf_counter()
+    rows = 0
+    for listings in ingestion.iter_batches(path, batch_size):
+        source.put([listings])
+        vector_database.connector.flush()
+        rows += len(listings)
+        logger.info("Embedded {} listings, {:.1f} rows/sec", rows, rows / (time.perf_counter() - start))
+    vector_database.connector.wait()
+    logger.info(
+        "Uploaded {} points to {} in {:.1f}s",
+        vector_database.connector.uploaded_points,
+        collection,
+        time.perf_counter() - start,
+    )
+
+    client.update_collection(
+        collection, optimizers_config=OptimizersConfigDiff(indexing_threshold=setting.QDRANT_INDEXING_THRESHOLD)
+    )
+    qdrant.wait_until_indexed(client, collection, setting.QDRANT_INDEXING_TIMEOUT_SECONDS)
+    if query_log.query_log is None:
+        logger.warning("QUERY_LOG_PATH is not set, swapping to {} without a smoke test", collection)
+    elif smoke_test_queries:
+        smoke_test(app, query_log.query_log.recent(smoke_test_queries))
+    qdrant.swap_alias(client, alias, collection)
+    response_cache.invalidate_server(setting.SUPERLINKED_API_URL)
+    qdrant.garbage_collect(client, alias, keep_collections)
+    return collection
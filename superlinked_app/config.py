@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from loguru import logger
 from pydantic import SecretStr, model_validator
@@ -8,18 +9,111 @@ ROOT_DIR = Path(__file__).parent.parent
 ENV_FILE = ROOT_DIR / ".env"
 logger.info("Loading environment variables from .env file: %s", ENV_FILE)
 
-assert ENV_FILE.exists(), f"Environment file not found: {ENV_FILE}"
+if not ENV_FILE.exists():
+    logger.warning("Environment file not found: {}, reading the settings from the environment only", ENV_FILE)
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=str(ENV_FILE), env_file_encoding="utf-8")
     
+    # Read in chunks of the ingestion batch size when it is a CSV file. The tools stream Parquet row groups,
+    # but the server's data loader reads a Parquet file in a single pass.
     DATA_PATH: str = "data/listings.csv"
     USE_QDRANT_VECTOR_DB: bool = True
     QDRANT_CLUSTER_NAME: str = 'airbnb'
     QDRANT_COLLECTION_NAME: str = 'airbnb_semantic_search'
     QDRANT_API_KEY: SecretStr
     QDRANT_CLUSTER_URL: SecretStr
+    # qdrant-client local mode instead of QDRANT_CLUSTER_URL: ":memory:" or a directory, e.g. for tests.
+    QDRANT_LOCAL_PATH: str | None = None
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    # Connections kept open to Qdrant, shared by the searches and uploads of a process.
+    QDRANT_POOL_SIZE: int = 16
+    QDRANT_TIMEOUT_SECONDS: int = 30
+    # Retries of requests that failed to reach Qdrant, backing off exponentially from the base delay.
+    QDRANT_RETRIES: int = 3
+    QDRANT_RETRY_BACKOFF_SECONDS: float = 0.1
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_ON_DISK_VECTORS: bool = False
+    # Scalar quantization stores int8 copies of the vectors for search, a quarter of the float32 RAM.
+    QDRANT_QUANTIZATION: Literal["none", "scalar", "product"] = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_PRODUCT_COMPRESSION: Literal["x4", "x8", "x16", "x32", "x64"] = "x16"
+    # Bulk loads upload into a fresh collection with indexing off, then restore this threshold (in KB).
+    QDRANT_BULK_UPLOAD_WORKERS: int = 4
+    QDRANT_BULK_UPLOAD_BATCH_SIZE: int = 512
+    QDRANT_INDEXING_THRESHOLD: int = 20000
+    QDRANT_INDEXING_TIMEOUT_SECONDS: float = 3600
+    # Recent queries replayed as a smoke test of a freshly loaded collection before the alias is swapped to it.
+    QDRANT_SMOKE_TEST_QUERIES: int = 200
+    # Older <QDRANT_COLLECTION_NAME>_<timestamp> collections kept for rollback after a swap.
+    QDRANT_KEEP_COLLECTIONS: int = 1
     
+    INGESTION_BATCH_SIZE: int = 1000
+    # Probe throughput at startup and pick the best batch size among the candidates instead.
+    INGESTION_AUTOTUNE: bool = False
+    INGESTION_AUTOTUNE_CANDIDATES: list[int] = [100, 250, 500, 1000]
+    INGESTION_MEMORY_BUDGET_MB: int = 2048
+    # LRU entries per embedding model, shared by every space using that model during ingestion.
+    EMBEDDING_CACHE_SIZE: int = 20000
+    # LRU entries for query texts, keyed by model and text and shared by every query endpoint.
+    QUERY_EMBEDDING_CACHE_SIZE: int = 10000
+    # SQLite file that keeps text embeddings across runs, so re-ingesting unchanged listings skips the model.
+    EMBEDDING_STORE_PATH: str | None = None
+    EMBEDDING_STORE_MAX_ENTRIES: int = 2_000_000
+    # Worker processes that embed ingested texts, each with its own model copy; 0 embeds in process.
+    # Keep EMBEDDING_WORKERS * EMBEDDING_WORKER_TORCH_THREADS at or below the number of cores.
+    EMBEDDING_WORKERS: int = 0
+    EMBEDDING_WORKER_TORCH_THREADS: int = 1
+    EMBEDDING_WORKER_CHUNK_SIZE: int = 32
+    # "int8" quantizes the text models' linear layers, "onnx" runs EMBEDDING_ONNX_FILE with ONNX Runtime.
+    # Check the recall cost with tools/evaluate_embedding_backend.py.
+    EMBEDDING_BACKEND: Literal["torch", "int8", "onnx"] = "torch"
+    EMBEDDING_ONNX_FILE: str = "onnx/model.onnx"
+    # Fingerprints of the listings sent by the last delta ingestion, see tools/delta_ingest.py.
+    DELTA_FINGERPRINT_PATH: str = "data/fingerprints.sqlite"
+    SUPERLINKED_API_URL: str = "http://localhost:8080"
+    # JSONL file the server appends every REST query payload to, rotated past QUERY_LOG_MAX_MB.
+    QUERY_LOG_PATH: str | None = None
+    QUERY_LOG_MAX_MB: int = 64
+    # Responses of the query endpoints, keyed by endpoint and resolved params and dropped on ingestion.
+    # "redis" shares them between processes through RESPONSE_CACHE_REDIS_URL, "local" keeps them in process.
+    RESPONSE_CACHE_BACKEND: Literal["off", "local", "redis"] = "local"
+    RESPONSE_CACHE_SIZE: int = 10000
+    RESPONSE_CACHE_TTL_SECONDS: float = 300
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    # Prometheus metrics of every search stage, the caches and ingestion, served on /metrics.
+    METRICS_ENABLED: bool = True
+    # JSONL file the query endpoint requests slower than SLOW_QUERY_THRESHOLD_MS are written to, with their
+    # resolved params, stage timings and result count. Needs METRICS_ENABLED.
+    SLOW_QUERY_LOG_PATH: str | None = None
+    SLOW_QUERY_THRESHOLD_MS: float = 1000
+    # Share of requests whose stack is sampled every SLOW_QUERY_PROFILE_INTERVAL_MS. The profile of those that
+    # turn out slow is written to SLOW_QUERY_PROFILE_DIR.
+    SLOW_QUERY_PROFILE_RATE: float = 0.0
+    SLOW_QUERY_PROFILE_INTERVAL_MS: float = 5
+    SLOW_QUERY_PROFILE_DIR: str = "data/slow_query_profiles"
+    # POST <query endpoint>/batch answers up to BATCH_SEARCH_MAX_QUERIES param sets per request, resolving
+    # and searching BATCH_SEARCH_WORKERS of them at a time.
+    BATCH_SEARCH_MAX_QUERIES: int = 1000
+    BATCH_SEARCH_WORKERS: int = 8
+    # Parameters extracted from natural queries, keyed on the normalized text, query name, model and the
+    # params the request set itself.
+    NLQ_CACHE_SIZE: int = 10000
+    NLQ_CACHE_TTL_SECONDS: float = 24 * 60 * 60
+    # SQLite file that keeps them across restarts.
+    NLQ_CACHE_PATH: str | None = None
+    # Read price, rating and room type filters locally and only send the rest of the query to the LLM.
+    NLQ_RULES_ENABLED: bool = True
+    # Share of the filter phrases in a query the rules must read, otherwise the LLM parses all of it.
+    NLQ_RULES_MIN_CONFIDENCE: float = 1.0
+    # "live" calls OpenAI, "record" also appends each extraction to NLQ_RECORDINGS_PATH, and "replay"
+    # serves those recordings after NLQ_REPLAY_LATENCY_MS instead of calling OpenAI.
+    NLQ_BACKEND: Literal["live", "record", "replay"] = "live"
+    NLQ_RECORDINGS_PATH: str = "data/nlq_recordings.jsonl"
+    NLQ_REPLAY_LATENCY_MS: float = 0.0
+
     OPENAI_API_KEY: SecretStr
     OPENAI_MODEL_ID: str = "gpt-4o"
 
@@ -34,12 +128,12 @@ class Settings(BaseSettings):
             ]
             
             missing_settings = [
-            setting for setting in required_settings 
-            if not getattr(self, setting, None)
-        ]
+                setting for setting in required_settings 
+                if not getattr(self, setting, None)
+            ]
         
-        if missing_settings:
-            raise ValueError(f"Missing required Qdrant settings: {missing_settings}")
+            if missing_settings:
+                raise ValueError(f"Missing required Qdrant settings: {missing_settings}")
         
         return self
     
@@ -1 +1,7 @@
-# Add your constants here 
\ No newline at end of file
+# Add your constants here
+
+# Every TextSimilaritySpace uses this model, so a single instance and embedding cache serve all of them.
+TEXT_EMBEDDING_MODEL = "Alibaba-NLP/gte-large-en-v1.5"
+
+# The room_type categories of the listings, shared by the categorical space, the query param and the rules.
+ROOM_TYPES = ["Private room", "Entire home/apt", "Shared room", "Hotel room"]
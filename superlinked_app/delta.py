@@ -0,0 +1,77 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import superlinked.framework as sl
+from loguru import logger
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from superlinked_app import index
+
+# Pinned so a listing hashes the same whichever chunk it lands in and whatever pandas would infer.
+DTYPE_BY_SCHEMA_FIELD_TYPE = {
+    sl.IdField: "string",
+    sl.String: "string",
+    sl.Float: "float64",
+    sl.Integer: "Int64",
+}
+SCHEMA_DTYPES = {
+    name: DTYPE_BY_SCHEMA_FIELD_TYPE[field_type] for name, field_type in index.DataSchema.__annotations__.items()
+}
+
+metadata = MetaData()
+
+fingerprints_table = Table(
+    "fingerprints",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("fingerprint", Integer, nullable=False),
+)
+
+
+def read_listings(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    columns = list(SCHEMA_DTYPES)
+    if Path(path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas().astype(SCHEMA_DTYPES)
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=SCHEMA_DTYPES, chunksize=batch_size)
+
+
+def fingerprint(listings: pd.DataFrame) -> pd.Series:
+    """A 64-bit hash per listing over every DataSchema field, so a change to any stored value is picked up."""
+    hashes = pd.util.hash_pandas_object(listings[list(SCHEMA_DTYPES)], index=False)
+    # SQLite integers are signed.
+    return pd.Series(hashes.to_numpy().view("int64"), index=listings["id"].to_numpy())
+
+
+class FingerprintStore:
+    """Per-listing fingerprints of what was last written to the vector database."""
+
+    def __init__(self, path: str) -> None:
+        self._engine = create_engine(f"sqlite:///{path}")
+        metadata.create_all(self._engine)
+
+    def load(self) -> dict[str, int]:
+        with self._engine.connect() as connection:
+            return dict(connection.execute(select(fingerprints_table.c.id, fingerprints_table.c.fingerprint)).all())
+
+    def upsert(self, fingerprints: pd.Series) -> None:
+        if fingerprints.empty:
+            return
+        rows = [{"id": id_, "fingerprint": int(value)} for id_, value in fingerprints.items()]
+        statement = insert(fingerprints_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[fingerprints_table.c.id], set_={"fingerprint": statement.excluded.fingerprint}
+        )
+        with self._engine.begin() as connection:
+            connection.execute(statement, rows)
+
+    def delete(self, ids: list[str]) -> None:
+        with self._engine.begin() as connection:
+            for start in range(0, len(ids), 500):
+                connection.execute(delete(fingerprints_table).where(fingerprints_table.c.id.in_(ids[start : start + 500])))
+        logger.debug("Forgot {} fingerprints", len(ids))
@@ -0,0 +1,199 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from pathlib import Path
+from threading import Lock
+
+import superlinked.framework as sl
+from loguru import logger
+from sentence_transformers import SentenceTransformer
+from superlinked.framework.common.dag.context import ExecutionContext
+from superlinked.framework.common.data_types import Vector
+from superlinked.framework.common.observable import Subscriber
+from superlinked.framework.common.parser.parsed_schema import ParsedSchema
+from superlinked.framework.common.space.config.embedding.text_similarity_embedding_config import (
+    TextSimilarityEmbeddingConfig,
+)
+from superlinked.framework.common.space.embedding import embedding_factory
+from superlinked.framework.common.space.embedding.embedding_cache import CacheInformation, EmbeddingCache
+from superlinked.framework.common.space.embedding.sentence_transformer_embedding import (
+    SentenceTransformerEmbedding,
+)
+from superlinked.framework.common.space.embedding.sentence_transformer_manager import SentenceTransformerManager
+from superlinked.framework.common.util.gpu_embedding_util import GpuEmbeddingUtil
+
+from superlinked_app import embedding_backend
+from superlinked_app.config import setting
+from superlinked_app.embedding_pool import EmbeddingPool
+from superlinked_app.embedding_store import EmbeddingStore
+from superlinked_app.query_embedding_cache import QueryEmbeddingCache
+
+
+class LockedEmbeddingCache(EmbeddingCache):
+    """EmbeddingCache that can be shared by the ingestion thread and concurrent queries."""
+
+    def __init__(self, cache_size: int) -> None:
+        super().__init__(cache_size)
+        self._lock = Lock()
+
+    def calculate_cache_info(self, inputs: Sequence[str]) -> CacheInformation:
+        with self._lock:
+            return super().calculate_cache_info(inputs)
+
+    def update(self, inputs_to_embed: Sequence[str], uncached_vectors: Sequence[Vector]) -> None:
+        with self._lock:
+            super().update(inputs_to_embed, uncached_vectors)
+
+
+class PooledSentenceTransformerManager(SentenceTransformerManager):
+    """Runs the model with EMBEDDING_BACKEND, in a pool of worker processes when workers is set.
+
+    Inputs smaller than a chunk, such as query texts, are embedded in process instead of queueing up
+    behind ingestion.
+    """
+
+    def __init__(self, model_name: str, workers: int = 0) -> None:
+        super().__init__(model_name)
+        self._pool = (
+            EmbeddingPool(
+                model_name,
+                setting.EMBEDDING_BACKEND,
+                self._model_cache_dir,
+                workers,
+                setting.EMBEDDING_WORKER_TORCH_THREADS,
+                setting.EMBEDDING_WORKER_CHUNK_SIZE,
+            )
+            if workers
+            else None
+        )
+
+    def _get_embedding_model(self, number_of_inputs: int) -> SentenceTransformer:
+        return embedding_backend.load_model(
+            self._model_name,
+            setting.EMBEDDING_BACKEND,
+            self._model_cache_dir,
+            GpuEmbeddingUtil.get_device_type(number_of_inputs),
+        )
+
+    def _embed(self, inputs: Sequence[str]) -> list[list[float]]:
+        if self._pool is None or len(inputs) < self._pool.chunk_size:
+            return super()._embed(inputs)
+        return self._pool.embed(inputs)
+
+    def embed_query_text(self, inputs: Sequence[str]) -> list[Vector]:
+        """Embeds query texts, which are never read from or written to the embedding store."""
+        return SentenceTransformerManager.embed_text(self, inputs)
+
+
+class StoredSentenceTransformerManager(PooledSentenceTransformerManager):
+    """Looks texts up in the persistent embedding store and only runs the model for the missing ones.
+
+    Only the listing texts of ingestion go through the store, query texts use embed_query_text.
+    """
+
+    def __init__(self, model_name: str, store: EmbeddingStore, workers: int = 0) -> None:
+        super().__init__(model_name, workers)
+        self._store = store
+
+    def embed_text(self, inputs: Sequence[str]) -> list[Vector]:
+        if not inputs:
+            return []
+        vectors = self._store.get_many(self._model_name, inputs)
+        missing = [text for text in dict.fromkeys(inputs) if text not in vectors]
+        if missing:
+            new_vectors = super().embed_text(missing)
+            self._store.put_many(self._model_name, missing, [vector.value for vector in new_vectors])
+            vectors.update((text, vector.value) for text, vector in zip(missing, new_vectors))
+        logger.debug(
+            "Embedding store: {} of {} texts found, hit rate {:.1%}",
+            len(inputs) - len(missing),
+            len(inputs),
+            self._store.hit_rate,
+        )
+        return [Vector(vectors[text]) for text in inputs]
+
+
+embedding_store = (
+    EmbeddingStore(setting.EMBEDDING_STORE_PATH, setting.EMBEDDING_STORE_MAX_ENTRIES)
+    if setting.EMBEDDING_STORE_PATH
+    else None
+)
+
+query_embedding_cache = QueryEmbeddingCache(setting.QUERY_EMBEDDING_CACHE_SIZE)
+
+_managers: dict[str, PooledSentenceTransformerManager] = {}
+_caches: dict[str, LockedEmbeddingCache] = {}
+
+
+def get_manager(model_name: str) -> PooledSentenceTransformerManager:
+    if model_name not in _managers:
+        _managers[model_name] = (
+            StoredSentenceTransformerManager(model_name, embedding_store, setting.EMBEDDING_WORKERS)
+            if embedding_store is not None
+            else PooledSentenceTransformerManager(model_name, setting.EMBEDDING_WORKERS)
+        )
+    return _managers[model_name]
+
+
+def get_cache(model_name: str) -> LockedEmbeddingCache:
+    if model_name not in _caches:
+        _caches[model_name] = LockedEmbeddingCache(setting.EMBEDDING_CACHE_SIZE)
+    return _caches[model_name]
+
+
+class SharedSentenceTransformerEmbedding(SentenceTransformerEmbedding):
+    """Embeds through the one manager and LRU cache kept per model name, so every TextSimilaritySpace
+    using the same model also reuses the vectors the others already computed.
+
+    Query texts go through query_embedding_cache instead, which every query endpoint shares.
+    """
+
+    def __init__(self, embedding_config: TextSimilarityEmbeddingConfig, model_cache_dir: Path | None = None) -> None:
+        super().__init__(embedding_config, model_cache_dir)
+        self.manager = get_manager(embedding_config.model_name)
+        self._cache = get_cache(embedding_config.model_name)
+
+    def embed_multiple(self, inputs: Sequence[str], context: ExecutionContext) -> list[Vector]:
+        if not context.is_query_context:
+            return super().embed_multiple(inputs, context)
+        return query_embedding_cache.embed(self._config.model_name, inputs, self.manager.embed_query_text)
+
+
+# Superlinked builds one embedding per space and executor from this mapping when the executor is run.
+embedding_factory.EMBEDDING_BY_CONFIG_CLASS[TextSimilarityEmbeddingConfig] = SharedSentenceTransformerEmbedding
+
+
+class TextEmbeddingPrefetcher(Subscriber[ParsedSchema]):
+    """Embeds the texts of all given spaces that share a model in a single forward pass per ingested batch.
+
+    Register it on a source before the executor is run: subscribers are notified in registration order,
+    so the spaces' embedding nodes find every vector of the batch in the shared cache.
+    """
+
+    def __init__(self, spaces: Sequence[sl.TextSimilaritySpace]) -> None:
+        super().__init__()
+        self._field_names_by_model: dict[str, set[str]] = defaultdict(set)
+        for space in spaces:
+            model_name = space.transformation_config.embedding_config.model_name
+            self._field_names_by_model[model_name].update(field.name for field in space.text.fields)
+
+    def update(self, messages: Sequence[ParsedSchema]) -> None:
+        for model_name, field_names in self._field_names_by_model.items():
+            texts = list(
+                dict.fromkeys(
+                    parsed_field.value
+                    for message in messages
+                    for parsed_field in message.fields
+                    if parsed_field.schema_field.name in field_names and isinstance(parsed_field.value, str)
+                )
+            )
+            cache = get_cache(model_name)
+            if len(texts) > setting.EMBEDDING_CACHE_SIZE:
+                logger.warning(
+                    "Skipping prefetch of {} texts, more than EMBEDDING_CACHE_SIZE={}",
+                    len(texts),
+                    setting.EMBEDDING_CACHE_SIZE,
+                )
+                continue
+            texts_to_embed = cache.calculate_cache_info(texts).inputs_to_embed
+            if texts_to_embed:
+                cache.update(texts_to_embed, get_manager(model_name).embed_text(texts_to_embed))
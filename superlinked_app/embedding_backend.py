@@ -0,0 +1,42 @@
+from functools import cache
+from pathlib import Path
+
+import torch
+from loguru import logger
+from sentence_transformers import SentenceTransformer
+from superlinked.framework.common.space.embedding.sentence_transformer_model_cache import (
+    SentenceTransformerModelCache,
+)
+from superlinked.framework.common.util.gpu_embedding_util import CPU_DEVICE_TYPE
+
+from superlinked_app.config import setting
+
+
+@cache
+def load_model(model_name: str, backend: str, model_cache_dir: Path, device: str) -> SentenceTransformer:
+    """The model run by backend:
+
+    - "torch" is superlinked's fp32 model.
+    - "int8" quantizes the weights of its linear layers to int8, activations are quantized on the fly.
+    - "onnx" runs EMBEDDING_ONNX_FILE from the model repository with ONNX Runtime, which needs the
+      onnx extra.
+    """
+    if backend == "onnx":
+        logger.info("Running {} with ONNX Runtime from {}", model_name, setting.EMBEDDING_ONNX_FILE)
+        return SentenceTransformer(
+            model_name,
+            backend="onnx",
+            model_kwargs={"file_name": setting.EMBEDDING_ONNX_FILE},
+            trust_remote_code=True,
+            device=device,
+            cache_folder=str(model_cache_dir),
+        )
+    model = SentenceTransformerModelCache.initialize_model(model_name, device, model_cache_dir)
+    if backend != "int8":
+        return model
+    if device != CPU_DEVICE_TYPE:
+        logger.warning("int8 dynamic quantization only runs on CPU, using the fp32 {} on {}", model_name, device)
+        return model
+    logger.info("Quantizing the linear layers of {} to int8", model_name)
+    # Returns a quantized copy, the fp32 model stays in superlinked's model cache.
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
@@ -0,0 +1,57 @@
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import torch
+from loguru import logger
+from sentence_transformers import SentenceTransformer
+from superlinked.framework.common.util.gpu_embedding_util import CPU_DEVICE_TYPE
+
+from superlinked_app.embedding_backend import load_model
+
+# The model of a worker process, loaded once by _init_worker.
+_model: SentenceTransformer | None = None
+
+
+def _init_worker(model_name: str, backend: str, model_cache_dir: str, torch_threads: int) -> None:
+    global _model
+    torch.set_num_threads(torch_threads)
+    _model = load_model(model_name, backend, Path(model_cache_dir), CPU_DEVICE_TYPE)
+
+
+def _embed_chunk(texts: list[str]) -> np.ndarray:
+    return _model.encode(texts)
+
+
+class EmbeddingPool:
+    """Worker processes that each hold a copy of one model and embed chunks of a batch in parallel.
+
+    Workers are spawned rather than forked, torch's thread pools don't survive a fork. Chunks come back
+    in the order they were sent, so the caller can keep writing the vectors from a single thread.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str,
+        model_cache_dir: Path,
+        workers: int,
+        torch_threads: int,
+        chunk_size: int,
+    ) -> None:
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, str(model_cache_dir), torch_threads),
+        )
+        logger.info(
+            "Embedding {} in {} worker processes with {} torch threads each", model_name, workers, torch_threads
+        )
+
+    def embed(self, texts: Sequence[str]) -> list[list[float]]:
+        chunks = [list(texts[start : start + self.chunk_size]) for start in range(0, len(texts), self.chunk_size)]
+        return [vector for vectors in self._executor.map(_embed_chunk, chunks) for vector in vectors.tolist()]
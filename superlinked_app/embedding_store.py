@@ -0,0 +1,163 @@
+import hashlib
+import time
+from collections import defaultdict
+from collections.abc import Sequence
+from threading import Lock
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import Column, Float, LargeBinary, MetaData, String, Table, create_engine, event, func, select
+from sqlalchemy import text as sql_text
+
+# SQLite's bound-parameter limit is 999 on older builds.
+QUERY_BATCH_SIZE = 500
+# Evicting down to this fraction of max_entries keeps a full store from evicting on every insert.
+EVICTION_TARGET = 0.9
+# Eviction only needs coarse recency, so a hit bumps last_used only when it is older than this.
+LAST_USED_RESOLUTION_SECONDS = 60 * 60
+# Bumps are queued and written with the next put_many, eviction, or once this many are pending.
+TOUCH_BATCH_SIZE = 1000
+
+metadata = MetaData()
+
+embeddings_table = Table(
+    "embeddings",
+    metadata,
+    Column("model", String, primary_key=True),
+    Column("text_hash", String, primary_key=True),
+    Column("vector", LargeBinary, nullable=False),
+    Column("last_used", Float, nullable=False, index=True),
+)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Disk-backed embedding cache keyed by (model, sha256 of the text).
+
+    Vectors are stored as float32, which is what the sentence-transformers models produce, so a round
+    trip is lossless. Once the store holds more than max_entries vectors, the least recently used ones
+    are evicted.
+
+    Lookups only read. last_used is bumped in batches, at most once per LAST_USED_RESOLUTION_SECONDS
+    per vector, so a hit on the query path doesn't open a write transaction.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self._engine = create_engine(f"sqlite:///{path}")
+        event.listen(self._engine, "connect", self._configure_connection)
+        metadata.create_all(self._engine)
+        self._max_entries = max_entries
+        self._lock = Lock()
+        # (model, text_hash) of the hits whose last_used is due for a bump.
+        self._stale_hits: set[tuple[str, str]] = set()
+        with self._engine.connect() as connection:
+            self._entries = connection.execute(select(func.count()).select_from(embeddings_table)).scalar_one()
+        self.hits = 0
+        self.misses = 0
+        logger.info("Embedding store at {} holds {} vectors", path, self._entries)
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, _connection_record) -> None:
+        # WAL lets queries read while the data loader writes.
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> dict[str, np.ndarray]:
+        hash_to_text = {text_hash(text): text for text in texts}
+        found: dict[str, np.ndarray] = {}
+        hashes = list(hash_to_text)
+        stale_before = time.time() - LAST_USED_RESOLUTION_SECONDS
+        stale_hits: list[tuple[str, str]] = []
+        with self._engine.connect() as connection:
+            for start in range(0, len(hashes), QUERY_BATCH_SIZE):
+                batch = hashes[start : start + QUERY_BATCH_SIZE]
+                rows = connection.execute(
+                    select(embeddings_table.c.text_hash, embeddings_table.c.vector, embeddings_table.c.last_used).where(
+                        embeddings_table.c.model == model, embeddings_table.c.text_hash.in_(batch)
+                    )
+                ).all()
+                for row in rows:
+                    found[hash_to_text[row.text_hash]] = np.frombuffer(row.vector, dtype=np.float32).astype(np.float64)
+                    if row.last_used < stale_before:
+                        stale_hits.append((model, row.text_hash))
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(hash_to_text) - len(found)
+            self._stale_hits.update(stale_hits)
+            should_touch = len(self._stale_hits) >= TOUCH_BATCH_SIZE
+        if should_touch:
+            with self._engine.begin() as connection:
+                self._touch(connection)
+        return found
+
+    def _touch(self, connection) -> None:
+        """Write the queued last_used bumps in the transaction of connection."""
+        with self._lock:
+            stale_hits, self._stale_hits = self._stale_hits, set()
+        hashes_by_model: dict[str, list[str]] = defaultdict(list)
+        for model, hash_ in stale_hits:
+            hashes_by_model[model].append(hash_)
+        now = time.time()
+        for model, hashes in hashes_by_model.items():
+            for start in range(0, len(hashes), QUERY_BATCH_SIZE):
+                connection.execute(
+                    embeddings_table.update()
+                    .where(
+                        embeddings_table.c.model == model,
+                        embeddings_table.c.text_hash.in_(hashes[start : start + QUERY_BATCH_SIZE]),
+                    )
+                    .values(last_used=now)
+                )
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        if not texts:
+            return
+        now = time.time()
+        rows = [
+            {
+                "model": model,
+                "text_hash": text_hash(text),
+                "vector": np.asarray(vector, dtype=np.float32).tobytes(),
+                "last_used": now,
+            }
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._engine.begin() as connection:
+            connection.execute(embeddings_table.insert().prefix_with("OR REPLACE"), rows)
+            self._touch(connection)
+        with self._lock:
+            # An upper bound: replaced rows are counted again until the next eviction recounts.
+            self._entries += len(rows)
+            should_evict = self._entries > self._max_entries
+        if should_evict:
+            self._evict()
+
+    def _evict(self) -> None:
+        with self._engine.begin() as connection:
+            # Recently read vectors must not look least recently used.
+            self._touch(connection)
+            entries = connection.execute(select(func.count()).select_from(embeddings_table)).scalar_one()
+            count = entries - int(self._max_entries * EVICTION_TARGET)
+            if count > 0:
+                connection.execute(
+                    sql_text(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT :count)"
+                    ),
+                    {"count": count},
+                )
+                entries -= count
+        with self._lock:
+            self._entries = entries
+        if count > 0:
+            logger.debug("Evicted {} vectors from the embedding store", count)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -1,5 +1,6 @@
 from superlinked import framework as sl
 from superlinked_app import constants
+from superlinked_app import embedding  # noqa: F401  # shares one model and cache across the text spaces
 # from superlinked_app.constants import TYPES as typ
 from datetime import timedelta, datetime
 
@@ -27,11 +28,11 @@ class DataSchema(sl.Schema):
 airbnb = DataSchema()
 
 category_space = sl.CategoricalSimilaritySpace(
-    category_input=airbnb.room_type, categories=['Private room', 'Entire home/apt', 'Shared room', 'Hotel room']
+    category_input=airbnb.room_type, categories=constants.ROOM_TYPES
 )
 
 description_space = sl.TextSimilaritySpace(
-    text=airbnb.description, model="Alibaba-NLP/gte-large-en-v1.5"
+    text=airbnb.description, model=constants.TEXT_EMBEDDING_MODEL
 )
 review_rating_maximizer_space = sl.NumberSpace(
     number=airbnb.review_scores_rating, min_value=-1.0, max_value=5.0, mode=sl.Mode.MAXIMUM
@@ -44,7 +45,7 @@ price_minimizer_space = sl.NumberSpace(
 #     period_time_list=[sl.PeriodTime(period=timedelta(days=365))]
 # )
 amenities_space = sl.TextSimilaritySpace(
-    text=airbnb.amenities, model="Alibaba-NLP/gte-large-en-v1.5"
+    text=airbnb.amenities, model=constants.TEXT_EMBEDDING_MODEL
 )
 
 airbnb_index = sl.Index(
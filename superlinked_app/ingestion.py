@@ -0,0 +1,151 @@
+import resource
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+
+from superlinked_app.config import setting
+
+# Bigger chunks also mean fewer vector database round trips, which the in-memory probe does not see,
+# so any size within this fraction of the best measured throughput counts as a tie and the larger one wins.
+THROUGHPUT_TOLERANCE = 0.05
+# Rows put through the probe pipeline before measuring, so the first candidate doesn't pay for loading the models.
+WARMUP_ROWS = 32
+RSS_SAMPLE_INTERVAL_S = 0.01
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux.
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        # No procfs (macOS): fall back to the high-water mark, which makes the estimate conservative.
+        return peak_rss_mb()
+
+
+def rss_growth_mb(fn: Callable[[], None]) -> float:
+    """Run fn and return how far the resident set rose above where it started, sampled while fn runs
+    and once after."""
+    rss_before = current_rss_mb()
+    samples = [rss_before]
+    done = threading.Event()
+
+    def sample() -> None:
+        while not done.wait(RSS_SAMPLE_INTERVAL_S):
+            samples.append(current_rss_mb())
+
+    sampler = threading.Thread(target=sample, name="rss-sampler", daemon=True)
+    sampler.start()
+    try:
+        fn()
+    finally:
+        done.set()
+        sampler.join()
+    samples.append(current_rss_mb())
+    return max(max(samples) - rss_before, 0.0)
+
+
+def read_sample(path: str, rows: int) -> pd.DataFrame:
+    if Path(path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        batch = next(pq.ParquetFile(path).iter_batches(batch_size=rows), None)
+        return batch.to_pandas() if batch is not None else pd.DataFrame()
+    return pd.read_csv(path, nrows=rows)
+
+
+def iter_batches(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """The dataset in frames of batch_size rows, typed like the data loader reads it."""
+    if Path(path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=batch_size)
+
+
+def autotune_batch_size(path: str, candidates: list[int], memory_budget_mb: int) -> int | None:
+    """Push a disjoint slice of the dataset through a throwaway in-memory pipeline for every candidate
+    batch size and return the one with the best rows/sec whose memory growth stays within the budget.
+
+    Returns None when no candidate could be measured.
+    """
+    import superlinked.framework as sl
+
+    from superlinked_app import index
+
+    sample = read_sample(path, WARMUP_ROWS + sum(candidates))
+    source = sl.InMemorySource(
+        index.airbnb,
+        parser=sl.DataFrameParser(schema=index.airbnb, mapping={index.airbnb.id: "id"}),
+    )
+    sl.InMemoryExecutor(sources=[source], indices=[index.airbnb_index]).run()
+    return measure_batch_sizes(source, sample, candidates, memory_budget_mb)
+
+
+def measure_batch_sizes(source, sample: pd.DataFrame, candidates: list[int], memory_budget_mb: int) -> int | None:
+    """The batch size of autotune_batch_size, measured by putting slices of sample through source.
+
+    The first WARMUP_ROWS rows are put unmeasured, since the first put loads the embedding models.
+    """
+    source.put([sample.iloc[:WARMUP_ROWS]])
+    rows_per_sec_by_batch_size: dict[int, float] = {}
+    offset = WARMUP_ROWS
+    for batch_size in sorted(candidates):
+        chunk = sample.iloc[offset : offset + batch_size]
+        offset += batch_size
+        if len(chunk) < batch_size:
+            logger.info("Not enough rows to probe batch size {}", batch_size)
+            break
+        start = time.perf_counter()
+        # Growth from this put alone: the process' peak RSS would still hold the peaks of earlier ones.
+        memory_mb = rss_growth_mb(lambda: source.put([chunk]))
+        rows_per_sec = batch_size / (time.perf_counter() - start)
+        logger.info(
+            "Batch size {}: {:.1f} rows/sec, {:.0f} MB memory growth", batch_size, rows_per_sec, memory_mb
+        )
+        if memory_mb > memory_budget_mb:
+            logger.info("Batch size {} exceeds the {} MB memory budget", batch_size, memory_budget_mb)
+            break
+        rows_per_sec_by_batch_size[batch_size] = rows_per_sec
+
+    if not rows_per_sec_by_batch_size:
+        return None
+    best = max(rows_per_sec_by_batch_size.values())
+    return max(
+        batch_size
+        for batch_size, rows_per_sec in rows_per_sec_by_batch_size.items()
+        if rows_per_sec >= (1 - THROUGHPUT_TOLERANCE) * best
+    )
+
+
+def resolve_batch_size() -> int:
+    """The number of rows the data loader hands to the pipeline at once."""
+    if not setting.INGESTION_AUTOTUNE:
+        return setting.INGESTION_BATCH_SIZE
+    if not Path(setting.DATA_PATH).exists():
+        logger.warning("Cannot auto-tune ingestion batch size, {} does not exist", setting.DATA_PATH)
+        return setting.INGESTION_BATCH_SIZE
+
+    logger.info("Auto-tuning ingestion batch size over {}", setting.INGESTION_AUTOTUNE_CANDIDATES)
+    batch_size = autotune_batch_size(
+        setting.DATA_PATH, setting.INGESTION_AUTOTUNE_CANDIDATES, setting.INGESTION_MEMORY_BUDGET_MB
+    )
+    if batch_size is None:
+        logger.warning("Auto-tuning measured no batch size, keeping {}", setting.INGESTION_BATCH_SIZE)
+        return setting.INGESTION_BATCH_SIZE
+    logger.info("Auto-tuned ingestion batch size: {}", batch_size)
+    return batch_size
@@ -0,0 +1,270 @@
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any
+
+import pandas as pd
+from fastapi import FastAPI, Request, Response
+from loguru import logger
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from superlinked.framework.dsl.app.rest.rest_app import RestApp
+from superlinked.framework.dsl.executor.query.query_executor import QueryExecutor
+from superlinked.framework.dsl.executor.rest.rest_handler import RestHandler
+from superlinked.framework.dsl.query.query_descriptor import QueryDescriptor
+from superlinked.framework.online.source.online_source import OnlineSource
+from superlinked.framework.storage.in_memory.in_memory_vdb import InMemoryVDB
+from superlinked.framework.storage.qdrant.qdrant_vdb_connector import QdrantVDBConnector
+from superlinked.server.middleware import lifespan_event
+from superlinked.server.util.fast_api_handler import FastApiHandler
+
+from superlinked_app import embedding, nlq
+from superlinked_app.config import setting
+from superlinked_app.slow_query_log import slow_query_log
+
+SEARCH_SECONDS = Histogram(
+    "airbnb_search_seconds",
+    "Time to answer a query endpoint request that missed the response cache.",
+    ["query", "outcome"],
+)
+SEARCH_STAGE_SECONDS = Histogram(
+    "airbnb_search_stage_seconds",
+    "Time a search spent in each stage.",
+    ["query", "stage"],
+)
+LLM_CALL_SECONDS = Histogram(
+    "airbnb_search_llm_call_seconds",
+    "Time of each call that extracts parameters from a natural query.",
+    ["backend"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32),
+)
+INGESTED_ROWS = Counter("airbnb_search_ingested_rows", "Rows put through each source.", ["source"])
+INGESTION_BATCH_SECONDS = Histogram(
+    "airbnb_search_ingestion_batch_seconds",
+    "Time to embed and write a batch put through each source.",
+    ["source"],
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+INGESTION_STAGE_SECONDS = Histogram(
+    "airbnb_search_ingestion_stage_seconds",
+    "Time ingestion spent in each stage.",
+    ["stage"],
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+# put is synchronous, so this is the number of calls inside put, not a backlog: the data loader is at
+# most 1, the REST source at most the number of concurrent ingest requests.
+INGESTION_ACTIVE_BATCHES = Gauge(
+    "airbnb_search_ingestion_active_batches",
+    "Batches being embedded or written through each source right now.",
+    ["source"],
+)
+
+
+@dataclass
+class SearchTrace:
+    """What a request to a query endpoint spent its time on, filled in while it runs."""
+
+    query_name: str
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    result_count: int | None = None
+    # The query with the parameters it ran with, those extracted from the natural query included.
+    query_descriptor: QueryDescriptor | None = None
+
+
+# The trace of the query endpoint request being served, if any.
+current_trace: ContextVar[SearchTrace | None] = ContextVar("current_trace", default=None)
+
+
+def _search_stage(stage: str, function: Callable) -> Callable:
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            trace = current_trace.get()
+            query_name = trace.query_name if trace is not None else nlq.current_query_name.get() or "other"
+            SEARCH_STAGE_SECONDS.labels(query_name, stage).observe(seconds)
+            if trace is not None:
+                trace.stage_seconds[stage] = trace.stage_seconds.get(stage, 0.0) + seconds
+
+    return wrapper
+
+
+def _ingestion_stage(stage: str, function: Callable) -> Callable:
+    observe = INGESTION_STAGE_SECONDS.labels(stage).observe
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def _llm_call(function: Callable) -> Callable:
+    observe = LLM_CALL_SECONDS.labels(setting.NLQ_BACKEND).observe
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+_query_handler = RestHandler._query_handler
+
+
+def _counted_query_handler(self: RestHandler, query_descriptor: dict, path: str):
+    start = time.perf_counter()
+    result = _query_handler(self, query_descriptor, path)
+    if (trace := current_trace.get()) is not None:
+        trace.stage_seconds["handler"] = time.perf_counter() - start
+        trace.result_count = len(result.entries)
+        trace.query_descriptor = result.query_descriptor
+    return result
+
+
+_query = FastApiHandler.query
+
+
+async def _traced_query(self: FastApiHandler, request: Request) -> Response:
+    trace = SearchTrace(request.url.path.rstrip("/").rsplit("/", 1)[-1])
+    token = current_trace.set(trace)
+    sampler = slow_query_log.start_sampler() if slow_query_log is not None else None
+    start = time.perf_counter()
+    try:
+        response = await _query(self, request)
+    except Exception:
+        SEARCH_SECONDS.labels(trace.query_name, "error").observe(time.perf_counter() - start)
+        if sampler is not None:
+            sampler.stop()
+        raise
+    finally:
+        current_trace.reset(token)
+    seconds = time.perf_counter() - start
+    # What the handler didn't spend searching went on reading the request and serializing the response.
+    if (handler_seconds := trace.stage_seconds.pop("handler", None)) is not None:
+        trace.stage_seconds["serialization"] = seconds - handler_seconds
+        SEARCH_STAGE_SECONDS.labels(trace.query_name, "serialization").observe(seconds - handler_seconds)
+    SEARCH_SECONDS.labels(trace.query_name, "ok").observe(seconds)
+    logger.bind(
+        query=trace.query_name,
+        seconds=seconds,
+        stage_seconds=trace.stage_seconds,
+        result_count=trace.result_count,
+    ).debug("Search {} took {:.1f} ms", trace.query_name, seconds * 1000)
+    if slow_query_log is not None:
+        slow_query_log.record(
+            trace.query_name,
+            seconds,
+            trace.query_descriptor,
+            trace.stage_seconds,
+            trace.result_count,
+            sampler,
+        )
+    return response
+
+
+def instrument_ingestion(source: OnlineSource, name: str) -> None:
+    """Count the rows put through source and time each batch, labelled with name."""
+    if not setting.METRICS_ENABLED:
+        return
+    put = source.put
+
+    @wraps(put)
+    def measured_put(data, put=put) -> None:
+        rows = sum(len(item) if isinstance(item, (pd.DataFrame, list)) else 1 for item in data)
+        INGESTION_ACTIVE_BATCHES.labels(name).inc()
+        start = time.perf_counter()
+        try:
+            put(data)
+        finally:
+            INGESTION_ACTIVE_BATCHES.labels(name).dec()
+        seconds = time.perf_counter() - start
+        INGESTION_BATCH_SECONDS.labels(name).observe(seconds)
+        INGESTED_ROWS.labels(name).inc(rows)
+        logger.bind(source=name, rows=rows, seconds=seconds).info(
+            "Ingested {} rows through {} in {:.2f}s, {:.0f} rows/s", rows, name, seconds, rows / max(seconds, 1e-9)
+        )
+
+    source.put = measured_put
+
+
+class CacheCollector(Collector):
+    """Reads the counters the caches already keep when Prometheus scrapes, instead of on every lookup."""
+
+    def __init__(self, caches: dict[str, Any]) -> None:
+        self._caches = caches
+
+    def collect(self) -> Iterator[CounterMetricFamily | GaugeMetricFamily]:
+        entries = GaugeMetricFamily("airbnb_search_cache_entries", "Entries held by each cache.", labels=["cache"])
+        counters: dict[str, CounterMetricFamily] = {}
+        for cache_name, cache in self._caches.items():
+            for stat, value in cache.stats().items():
+                if stat == "entries":
+                    entries.add_metric([cache_name], value)
+                elif stat != "hit_rate":
+                    if stat not in counters:
+                        counters[stat] = CounterMetricFamily(
+                            f"airbnb_search_cache_{stat}", f"Cache {stat.replace('_', ' ')}.", labels=["cache"]
+                        )
+                    counters[stat].add_metric([cache_name], value)
+        yield entries
+        yield from counters.values()
+        parses = CounterMetricFamily(
+            "airbnb_search_nlq_parses",
+            'Natural queries parsed without a cache hit, by "rules", "rules_and_llm" or "llm".',
+            labels=["method"],
+        )
+        for method, count in nlq.parse_counts.items():
+            parses.add_metric([method], count)
+        yield parses
+
+
+def register_caches(**caches: Any) -> None:
+    """Expose the stats() of every cache, keyed by the cache's name."""
+    if setting.METRICS_ENABLED:
+        REGISTRY.register(CacheCollector(caches))
+
+
+async def _metrics(_: Request) -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+_register_routes = lifespan_event._register_routes
+
+
+def _register_routes_with_metrics(app: FastAPI, rest_app: RestApp) -> None:
+    _register_routes(app, rest_app)
+    if not any(getattr(route, "path", None) == "/metrics" for route in app.routes):
+        app.add_api_route(path="/metrics", endpoint=_metrics, methods=["GET"], include_in_schema=False)
+        logger.info("Registered Prometheus metrics endpoint /metrics")
+
+
+if setting.METRICS_ENABLED:
+    nlq.CachedNLQParamEvaluator.evaluate_param_infos = _search_stage(
+        "nl_parse", nlq.CachedNLQParamEvaluator.evaluate_param_infos
+    )
+    nlq.CachedNLQParamEvaluator._execute_query = _llm_call(nlq.CachedNLQParamEvaluator._execute_query)
+    QueryExecutor._produce_query_vector = _search_stage("query_embedding", QueryExecutor._produce_query_vector)
+    QueryExecutor._knn_search = _search_stage("vector_search", QueryExecutor._knn_search)
+    embedding.TextEmbeddingPrefetcher.update = _ingestion_stage(
+        "text_embedding", embedding.TextEmbeddingPrefetcher.update
+    )
+    QdrantVDBConnector.write_entities = _ingestion_stage("vector_database_write", QdrantVDBConnector.write_entities)
+    InMemoryVDB.write_entities = _ingestion_stage("vector_database_write", InMemoryVDB.write_entities)
+    RestHandler._query_handler = _counted_query_handler
+    FastApiHandler.query = _traced_query
+    lifespan_event._register_routes = _register_routes_with_metrics
@@ -0,0 +1,145 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from loguru import logger
+from pydantic import BaseModel
+from superlinked.framework.common.nlq.open_ai import OpenAIClientConfig
+from superlinked.framework.dsl.executor.rest.rest_handler import RestHandler
+from superlinked.framework.dsl.query import query_param_value_setter
+from superlinked.framework.dsl.query.nlq_param_evaluator import NLQParamEvaluator
+from superlinked.framework.dsl.query.query_clause import NLQClause, NLQSystemPromptClause
+from superlinked.framework.dsl.query.query_descriptor import QueryDescriptor
+
+from superlinked_app import nlq_rules
+from superlinked_app.nlq_backend import NLQRecorder, NLQReplay
+from superlinked_app.config import setting
+from superlinked_app.nlq_cache import NLQueryCache, cache_key
+
+# Log the cache metrics every this many lookups.
+STATS_LOG_INTERVAL = 1000
+
+# Name of the RestQuery being served, e.g. "filter_query". Set for the duration of a REST query.
+current_query_name: ContextVar[str] = ContextVar("current_query_name", default="")
+
+nlq_cache = NLQueryCache(setting.NLQ_CACHE_SIZE, setting.NLQ_CACHE_TTL_SECONDS, setting.NLQ_CACHE_PATH)
+# How the parameters of uncached queries were extracted: "rules", "rules_and_llm" or "llm".
+parse_counts: Counter[str] = Counter()
+
+nlq_recorder = NLQRecorder(setting.NLQ_RECORDINGS_PATH) if setting.NLQ_BACKEND == "record" else None
+nlq_replay = (
+    NLQReplay(setting.NLQ_RECORDINGS_PATH, setting.NLQ_REPLAY_LATENCY_MS) if setting.NLQ_BACKEND == "replay" else None
+)
+
+_query_handler = RestHandler._query_handler
+
+
+def natural_query_param_names(query_descriptor: QueryDescriptor) -> set[str]:
+    """The params holding the natural query and its system prompt."""
+    return {
+        clause.get_param(clause.value_param).name
+        for clause in query_descriptor.clauses
+        if isinstance(clause, (NLQClause, NLQSystemPromptClause))
+    }
+
+
+def resolved_params(resolved: QueryDescriptor, params: dict[str, Any]) -> dict[str, Any]:
+    """params with the natural query replaced by the parameters extracted from it into resolved, the
+    descriptor QueryParamValueSetter returned for them.
+
+    Querying with the result runs the same search without parsing the natural query again.
+    """
+    return {
+        **{name: value for name, value in params.items() if name not in natural_query_param_names(resolved)},
+        **{info.name: info.value for info in resolved.calculate_param_infos() if info.value is not None},
+    }
+
+
+def _named_query_handler(self: RestHandler, query_descriptor: dict, path: str):
+    token = current_query_name.set(path.rstrip("/").rsplit("/", 1)[-1])
+    try:
+        return _query_handler(self, query_descriptor, path)
+    finally:
+        current_query_name.reset(token)
+
+
+class CachedNLQParamEvaluator(NLQParamEvaluator):
+    """Reuses the parameters extracted from a natural query the same query endpoint already parsed.
+
+    Uncached queries first go through the local rules. When they read every filter in the query, the
+    LLM only gets the remaining free text, or is skipped if there is none. NLQ_BACKEND decides whether
+    the LLM is called, called and recorded, or replayed from an earlier recording.
+    """
+
+    def evaluate_param_infos(
+        self,
+        natural_query: str,
+        client_config: OpenAIClientConfig,
+        system_prompt: str | None = None,
+    ) -> dict[str, Any]:
+        if self._all_params_have_value_set():
+            return {}
+        query_name = current_query_name.get() or ",".join(sorted(info.name for info in self._param_infos))
+        key = cache_key(natural_query, query_name, client_config.model, system_prompt, self._set_params())
+        params = nlq_cache.get(key)
+        if params is None:
+            params = self._extract_params(natural_query, client_config, system_prompt)
+            nlq_cache.put(key, params)
+        lookups = nlq_cache.hits + nlq_cache.misses
+        if lookups % STATS_LOG_INTERVAL == 0:
+            nlq_cache.log_stats()
+            logger.info("Natural query extraction: {}", dict(parse_counts))
+        return params
+
+    def _set_params(self) -> dict[str, Any]:
+        """The params the request set itself, the others are left to the natural query."""
+        return {info.name: info.value for info in self._param_infos if info.value is not None and not info.is_default}
+
+    def _extract_params(
+        self,
+        natural_query: str,
+        client_config: OpenAIClientConfig,
+        system_prompt: str | None,
+    ) -> dict[str, Any]:
+        if not setting.NLQ_RULES_ENABLED:
+            parse_counts["llm"] += 1
+            return super().evaluate_param_infos(natural_query, client_config, system_prompt)
+        set_params = self._set_params()
+        unset_param_names = {info.name for info in self._param_infos if info.name not in set_params}
+        rule_parse = nlq_rules.parse(natural_query, unset_param_names)
+        if rule_parse.confidence < setting.NLQ_RULES_MIN_CONFIDENCE:
+            parse_counts["llm"] += 1
+            return super().evaluate_param_infos(natural_query, client_config, system_prompt)
+        if not rule_parse.residual:
+            parse_counts["rules"] += 1
+            return rule_parse.params
+        parse_counts["rules_and_llm"] += 1
+        params = super().evaluate_param_infos(rule_parse.residual, client_config, system_prompt)
+        return {**params, **rule_parse.params}
+
+    def _execute_query(
+        self,
+        query: str,
+        instructor_prompt: str,
+        model_class: type[BaseModel],
+        client_config: OpenAIClientConfig,
+    ) -> dict[str, Any]:
+        query_name = current_query_name.get()
+        if nlq_replay is not None:
+            return nlq_replay.query(query, query_name, client_config.model)
+        params = super()._execute_query(query, instructor_prompt, model_class, client_config)
+        if nlq_recorder is not None:
+            nlq_recorder.record(query, query_name, client_config.model, params)
+        return params
+
+
+RestHandler._query_handler = _named_query_handler
+# QueryParamValueSetter looks the evaluator up in its module on every query.
+query_param_value_setter.NLQParamEvaluator = CachedNLQParamEvaluator
+logger.info("Natural query backend: {}", setting.NLQ_BACKEND)
+logger.info(
+    "Caching natural query parameters: {} entries, {}s TTL, disk: {}",
+    setting.NLQ_CACHE_SIZE,
+    setting.NLQ_CACHE_TTL_SECONDS,
+    setting.NLQ_CACHE_PATH,
+)
@@ -0,0 +1,66 @@
+import json
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from loguru import logger
+
+from superlinked_app.nlq_cache import cache_key
+
+
+class NLQRecorder:
+    """Appends every natural query sent to the LLM and the parameters it extracted to a JSONL file.
+
+    The lines have the shape tools/evaluate_nlq_rules.py reads, plus the query name and model.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+
+    def record(self, natural_query: str, query_name: str, model: str, params: dict[str, Any]) -> None:
+        line = json.dumps(
+            {"query_name": query_name, "natural_query": natural_query, "model": model, "params": params},
+            default=str,
+        )
+        with self._lock, self._path.open("a", encoding="utf-8") as recordings:
+            recordings.write(line + "\n")
+
+
+class NLQReplay:
+    """Serves recorded extractions in place of the LLM, after sleeping latency_ms to stand in for it.
+
+    Queries are matched like in the natural query cache, on the normalized text, query name and model.
+    A missing recordings file replays nothing, as if every query was unrecorded.
+    """
+
+    def __init__(self, path: str, latency_ms: float) -> None:
+        self._latency_s = latency_ms / 1000
+        self._params_by_key: dict[str, dict[str, Any]] = {}
+        if Path(path).exists():
+            with open(path, encoding="utf-8") as recordings:
+                for line in recordings:
+                    if line.strip():
+                        record = json.loads(line)
+                        key = cache_key(record["natural_query"], record["query_name"], record["model"])
+                        self._params_by_key[key] = record["params"]
+        else:
+            logger.warning("No recordings at {}, record some with NLQ_BACKEND=record first", path)
+        self.hits = 0
+        self.misses = 0
+        logger.info("Replaying {} recorded natural queries from {}", len(self._params_by_key), path)
+
+    def query(self, natural_query: str, query_name: str, model: str) -> dict[str, Any]:
+        if self._latency_s:
+            time.sleep(self._latency_s)
+        params = self._params_by_key.get(cache_key(natural_query, query_name, model))
+        if params is None:
+            self.misses += 1
+            logger.warning(
+                "No recording for {} natural query {!r}, leaving its parameters unset", query_name, natural_query
+            )
+            return {}
+        self.hits += 1
+        return dict(params)
@@ -0,0 +1,147 @@
+import copy
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import Column, Float, MetaData, String, Table, create_engine, delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+metadata = MetaData()
+
+nlq_params_table = Table(
+    "nlq_params",
+    metadata,
+    Column("key", String, primary_key=True),
+    Column("params", String, nullable=False),
+    Column("created_at", Float, nullable=False),
+)
+
+
+def normalize_query(natural_query: str) -> str:
+    """Case, unicode and whitespace variants of the same query share a cache entry."""
+    return " ".join(unicodedata.normalize("NFKC", natural_query).casefold().split())
+
+
+def cache_key(
+    natural_query: str,
+    query_name: str,
+    model: str,
+    system_prompt: str | None = None,
+    set_params: dict[str, Any] | None = None,
+) -> str:
+    """set_params are the values the request already set. They decide which params are left to extract
+    and reach the LLM as defaults, so requests that set different ones don't share an entry."""
+    parts = [
+        normalize_query(natural_query),
+        query_name,
+        model,
+        system_prompt or "",
+        json.dumps(set_params or {}, sort_keys=True, default=str),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class NLQueryCache:
+    """LRU cache with a TTL for the parameters the LLM extracted from a natural query.
+
+    With a path, entries are also written to SQLite, so a restarted server starts warm. Entries older
+    than ttl_seconds are treated as missing in both layers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, path: str | None = None) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = Lock()
+        self._engine = None
+        if path:
+            self._engine = create_engine(f"sqlite:///{path}")
+            metadata.create_all(self._engine)
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self._ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+        entry = self._read_from_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, entry)
+        return copy.deepcopy(entry[1])
+
+    def put(self, key: str, params: dict[str, Any]) -> None:
+        entry = (time.time(), copy.deepcopy(params))
+        with self._lock:
+            self._store(key, entry)
+        if self._engine is not None:
+            statement = insert(nlq_params_table).values(key=key, params=json.dumps(params), created_at=entry[0])
+            statement = statement.on_conflict_do_update(
+                index_elements=[nlq_params_table.c.key],
+                set_={"params": statement.excluded.params, "created_at": statement.excluded.created_at},
+            )
+            with self._engine.begin() as connection:
+                connection.execute(statement)
+
+    def _store(self, key: str, entry: tuple[float, dict[str, Any]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_from_disk(self, key: str, now: float) -> tuple[float, dict[str, Any]] | None:
+        if self._engine is None:
+            return None
+        with self._engine.begin() as connection:
+            row = connection.execute(
+                select(nlq_params_table.c.params, nlq_params_table.c.created_at).where(nlq_params_table.c.key == key)
+            ).first()
+            if row is None:
+                return None
+            if now - row.created_at > self._ttl_seconds:
+                connection.execute(delete(nlq_params_table).where(nlq_params_table.c.key == key))
+                with self._lock:
+                    self.expirations += 1
+                return None
+        return row.created_at, json.loads(row.params)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hit_rate,
+            }
+
+    def log_stats(self) -> None:
+        logger.info("Natural query cache: {}", self.stats())
@@ -0,0 +1,134 @@
+import re
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from typing import Any
+
+from superlinked_app.constants import ROOM_TYPES
+
+NUMBER = r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)"
+CURRENCY = r"(?:\$|usd|dollars?|euros?|eur|€|sek|kronor|kr)"
+
+PRICE_PATTERNS = [
+    # "price lower than 1000", "costs at most $80", "price < 500"
+    re.compile(
+        r"\b(?:price[sd]?|costs?|costing)\s+(?:is\s+|should\s+be\s+)?"
+        r"(?:lower|less|smaller|cheaper|below|under|at\s+most|no\s+more|not\s+more|up\s+to|max(?:imum)?|<=?)"
+        rf"\s*(?:than|of|to)?\s*{CURRENCY}?\s*{NUMBER}\s*{CURRENCY}?"
+    ),
+    # "under $100", "below 900 sek", "less than 80 per night"
+    re.compile(
+        rf"\b(?:under|below|less\s+than|cheaper\s+than|at\s+most|up\s+to)\s+"
+        rf"(?:{CURRENCY}\s*{NUMBER}|{NUMBER}\s*(?:{CURRENCY}|(?:{CURRENCY}\s*)?(?:per|a|/)\s*night))"
+    ),
+]
+RATING_PATTERNS = [
+    # "rating bigger than 4.5", "rated at least 4", "review score above 4.8"
+    re.compile(
+        r"\b(?:ratings?|rated|review\s+scores?|reviews?|score|stars?)\s+(?:is\s+|of\s+|should\s+be\s+)?"
+        r"(?:bigger|greater|higher|more|better|above|over|at\s+least|min(?:imum)?|>=?)"
+        rf"\s*(?:than|of)?\s*{NUMBER}(?:\s*stars?)?"
+    ),
+    # "4.5+ stars", "at least 4 stars"
+    re.compile(rf"\b(?:(?:at\s+least|over|above)\s+{NUMBER}|{NUMBER}\s*\+)\s*stars?\b"),
+]
+ROOM_TYPE_SYNONYMS = {
+    "Entire home/apt": r"(?:entire|whole)\s+(?:home|house|apartment|apt|flat|place)",
+    "Private room": r"private\s+rooms?",
+    "Shared room": r"shared\s+rooms?",
+    # Not a bare "hotel": "no hotels" or "near the hotel" would be read as a room type.
+    "Hotel room": r"hotel\s+rooms?",
+}
+ROOM_TYPE_PATTERNS = {
+    room_type: re.compile(rf"\b(?:{re.escape(room_type.lower())}|{ROOM_TYPE_SYNONYMS.get(room_type, '$^')})\b")
+    for room_type in ROOM_TYPES
+}
+
+# A filter phrase preceded by one of these within NEGATION_WINDOW words of its clause is left to the LLM:
+# "no shared rooms", "not under 300" and "near hotel rooms" don't ask for what the phrase reads as.
+NEGATION = re.compile(r"\b(?:no|not|without|except|near|nearby|next\s+to|close\s+to)\b|n't\b")
+NEGATION_WINDOW = 3
+CLAUSE_BOUNDARY = re.compile(r"[,.;!?]|\b(?:and|but|or)\b")
+
+# Words in text the rules did not consume that mean it still holds a filter they could not read.
+FILTER_SIGNALS = re.compile(
+    r"\d|\b(?:price[sd]?|costs?|cheap\w*|expensive|budget|ratings?|rated|reviews?|scores?|stars?"
+    r"|entire|whole|private|shared|hotels?)\b"
+)
+FILLER_WORDS = {
+    "a", "an", "the", "and", "or", "with", "that", "which", "is", "are", "has", "have", "for", "of",
+    "i", "me", "we", "want", "need", "looking", "find", "show", "please", "also", "something", "place",
+}  # fmt: skip
+
+
+@dataclass
+class RuleParse:
+    params: dict[str, Any] = field(default_factory=dict)
+    residual: str = ""
+    confidence: float = 0.0
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _first_number(match: re.Match) -> float:
+    return _number(next(group for group in match.groups() if group is not None))
+
+
+def _negated(text: str, match: re.Match) -> bool:
+    preceding = CLAUSE_BOUNDARY.split(text[: match.start()])[-1].split()[-NEGATION_WINDOW:]
+    return NEGATION.search(" ".join(preceding)) is not None
+
+
+def parse(natural_query: str, param_names: Collection[str]) -> RuleParse:
+    """Reads the price, rating and room type filters from a natural query.
+
+    Only filters among param_names are extracted. The text that is left is returned as the residual,
+    with a confidence of the share of filter phrases the rules consumed. A negated filter phrase is
+    left in the residual and drops the confidence to 0.
+    """
+    text = " ".join(natural_query.lower().split())
+    params: dict[str, Any] = {}
+    spans: list[tuple[int, int]] = []
+    negated = False
+
+    def consume(patterns: list[re.Pattern], param_name: str, max_value: float | None = None) -> None:
+        nonlocal negated
+        if param_name not in param_names:
+            return
+        for pattern in patterns:
+            match = pattern.search(text)
+            if match is None:
+                continue
+            if _negated(text, match):
+                negated = True
+                return
+            value = _first_number(match)
+            if max_value is not None and value > max_value:
+                return
+            params[param_name] = value
+            spans.append(match.span())
+            return
+
+    consume(PRICE_PATTERNS, "price_smaller_than")
+    consume(RATING_PATTERNS, "review_rating_bigger_than", max_value=5.0)
+    if "filter_by_type" in param_names:
+        for room_type, pattern in ROOM_TYPE_PATTERNS.items():
+            if match := pattern.search(text):
+                if _negated(text, match):
+                    negated = True
+                    break
+                params["filter_by_type"] = [room_type]
+                spans.append(match.span())
+                break
+
+    residual = text
+    for start, end in sorted(spans, reverse=True):
+        residual = residual[:start] + " " + residual[end:]
+    residual = " ".join(residual.split()).strip(" ,.;!?")
+    leftover_signals = len(FILTER_SIGNALS.findall(residual))
+    consumed = len(params)
+    confidence = consumed / (consumed + leftover_signals) if consumed and not negated else 0.0
+    if all(word in FILLER_WORDS for word in re.findall(r"\w+", residual)):
+        residual = ""
+    return RuleParse(params, residual, confidence)
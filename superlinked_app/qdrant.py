@@ -0,0 +1,391 @@
+import json
+import re
+import time
+from collections.abc import Iterable, Sequence
+from functools import cache
+
+import httpx
+from loguru import logger
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionStatus,
+    CompressionRatio,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    MatchAny,
+    PayloadSchemaType,
+    PointIdsList,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    QuantizationConfig,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+    VectorParamsDiff,
+)
+from superlinked.framework.common.interface.comparison_operand import ComparisonOperation
+from superlinked.framework.common.storage.entity.entity_id import EntityId
+from superlinked.framework.common.storage.field.field import Field
+from superlinked.framework.common.storage.field.field_data import FieldData
+from superlinked.framework.common.storage.field_type_converter import FieldTypeConverter
+from superlinked.framework.common.storage.index_config import IndexConfig
+from superlinked.framework.common.storage.search_index.manager.search_index_manager import SearchIndexManager
+from superlinked.framework.common.storage.vdb_connector import VDBConnector
+from superlinked.framework.common.storage_manager.storage_naming import StorageNaming
+from superlinked.framework.dsl.query.query_clause import HardFilterClause
+from superlinked.framework.dsl.query.query_descriptor import QueryDescriptor
+from superlinked.framework.dsl.storage.qdrant_vector_database import QdrantVectorDatabase
+from superlinked.framework.storage.common.vdb_settings import VDBSettings
+from superlinked.framework.storage.qdrant.qdrant_connection_params import QdrantConnectionParams
+from superlinked.framework.storage.qdrant.qdrant_field_descriptor_compiler import (
+    PAYLOAD_SCHEMA_BY_FIELD_DATA_TYPE,
+    QdrantFieldDescriptorCompiler,
+)
+from superlinked.framework.storage.qdrant.qdrant_field_encoder import QdrantFieldEncoder
+from superlinked.framework.storage.qdrant.qdrant_search_index_manager import QdrantSearchIndexManager
+from superlinked.framework.storage.qdrant.qdrant_vdb_connector import QdrantVDBConnector
+from superlinked.framework.storage.qdrant.query.qdrant_filter import MatchAnyFilter
+from superlinked.framework.storage.qdrant.query.qdrant_search import QdrantSearch
+
+from superlinked_app import index, query
+from superlinked_app.config import setting
+
+DELETE_BATCH_SIZE = 1000
+
+
+def grpc_retry_options() -> dict[str, int | str]:
+    """Channel options that retry UNAVAILABLE calls with exponential backoff."""
+    retry_policy = {
+        "maxAttempts": setting.QDRANT_RETRIES + 1,
+        "initialBackoff": f"{setting.QDRANT_RETRY_BACKOFF_SECONDS}s",
+        "maxBackoff": f"{setting.QDRANT_RETRY_BACKOFF_SECONDS * 2**setting.QDRANT_RETRIES}s",
+        "backoffMultiplier": 2,
+        "retryableStatusCodes": ["UNAVAILABLE"],
+    }
+    service_config = {"methodConfig": [{"name": [{}], "retryPolicy": retry_policy}]}
+    return {"grpc.enable_retries": 1, "grpc.service_config": json.dumps(service_config)}
+
+
+@cache
+def create_client() -> QdrantClient:
+    """The Qdrant client of this process, shared by the executor and the tools.
+
+    Over REST, its pool keeps QDRANT_POOL_SIZE connections alive, where qdrant-client opens one per
+    request by default. Local mode keeps its data in the client, so sharing it is what lets the
+    executor and the tools see the same collections.
+    """
+    if setting.QDRANT_LOCAL_PATH == ":memory:":
+        return QdrantClient(location=":memory:")
+    if setting.QDRANT_LOCAL_PATH:
+        return QdrantClient(path=setting.QDRANT_LOCAL_PATH)
+    if setting.QDRANT_PREFER_GRPC:
+        transport_params = {"pool_size": setting.QDRANT_POOL_SIZE, "grpc_options": grpc_retry_options()}
+    else:
+        # httpx retries failed connection attempts with exponential backoff.
+        transport_params = {
+            "transport": httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=setting.QDRANT_POOL_SIZE, max_keepalive_connections=setting.QDRANT_POOL_SIZE
+                ),
+                retries=setting.QDRANT_RETRIES,
+            )
+        }
+    return QdrantClient(
+        url=setting.QDRANT_CLUSTER_URL.get_secret_value(),
+        api_key=setting.QDRANT_API_KEY.get_secret_value(),
+        prefer_grpc=setting.QDRANT_PREFER_GRPC,
+        grpc_port=setting.QDRANT_GRPC_PORT,
+        timeout=setting.QDRANT_TIMEOUT_SECONDS,
+        **transport_params,
+    )
+
+
+def collection_name() -> str:
+    return setting.QDRANT_COLLECTION_NAME
+
+
+def alias_target(client: QdrantClient, alias: str) -> str | None:
+    aliases = client.get_aliases().aliases
+    return next((alias_.collection_name for alias_ in aliases if alias_.alias_name == alias), None)
+
+
+def resolve_alias(client: QdrantClient, name: str) -> str:
+    """The collection behind name if it is an alias, name itself otherwise."""
+    return alias_target(client, name) or name
+
+
+def swap_alias(client: QdrantClient, alias: str, collection: str) -> str | None:
+    """Point alias at collection in a single request and return the collection it pointed at before."""
+    previous = alias_target(client, alias)
+    if previous is None and client.collection_exists(alias):
+        raise ValueError(
+            f"{alias} is a collection, not an alias. Delete it or pick another QDRANT_COLLECTION_NAME "
+            "before loading behind an alias."
+        )
+    operations = [CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias))]
+    if previous is not None:
+        operations.insert(0, DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info("Alias {} now points at {} instead of {}", alias, collection, previous)
+    return previous
+
+
+def versioned_collection_name(alias: str) -> str:
+    return f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+
+
+def collection_versions(client: QdrantClient, alias: str) -> list[str]:
+    """The <alias>_<timestamp> collections, oldest first."""
+    pattern = re.compile(rf"{re.escape(alias)}_\d{{14}}")
+    return sorted(
+        collection.name for collection in client.get_collections().collections if pattern.fullmatch(collection.name)
+    )
+
+
+def garbage_collect(client: QdrantClient, alias: str, keep: int) -> list[str]:
+    """Delete the versions older than the one alias points at, except the newest keep of them.
+
+    Versions newer than the live one are left alone, another load may still be filling them.
+    """
+    live = alias_target(client, alias)
+    if live is None:
+        return []
+    older = [collection for collection in collection_versions(client, alias) if collection < live]
+    stale = older[: max(len(older) - keep, 0)]
+    for collection in stale:
+        logger.info("Deleting old Qdrant collection {}", collection)
+        client.delete_collection(collection)
+    return stale
+
+
+def wait_until_indexed(client: QdrantClient, collection: str, timeout_s: float, poll_interval_s: float = 2.0) -> None:
+    """Block until the optimizers of the collection are idle, i.e. its HNSW index is built."""
+    deadline = time.monotonic() + timeout_s
+    # The optimizers may not have picked up a configuration change yet.
+    time.sleep(poll_interval_s)
+    while (info := client.get_collection(collection)).status != CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Qdrant collection {collection} still {info.status} after {timeout_s}s")
+        logger.info(
+            "Waiting for {} to be indexed: {} of {} vectors", collection, info.indexed_vectors_count, info.points_count
+        )
+        time.sleep(poll_interval_s)
+
+
+def vectors_config() -> dict[str, VectorParams]:
+    """The named vector superlinked writes airbnb_index to, sized from the index itself."""
+    vector_name = StorageNaming().get_index_name_from_node_id(index.airbnb_index._node_id)
+    # Superlinked searches by inner product, see VDBConnector.
+    return {vector_name: VectorParams(size=index.airbnb_index._node.length, distance=Distance.DOT)}
+
+
+def quantization_config() -> QuantizationConfig | None:
+    if setting.QDRANT_QUANTIZATION == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=setting.QDRANT_QUANTIZATION_ALWAYS_RAM)
+        )
+    if setting.QDRANT_QUANTIZATION == "product":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(
+                compression=CompressionRatio(setting.QDRANT_PRODUCT_COMPRESSION),
+                always_ram=setting.QDRANT_QUANTIZATION_ALWAYS_RAM,
+            )
+        )
+    return None
+
+
+def filtered_payload_fields(queries: Iterable[QueryDescriptor]) -> dict[str, PayloadSchemaType]:
+    """The payload field and index type of every schema field compared in a .filter clause of queries."""
+    return {
+        StorageNaming().generate_field_name_from_schema_field(clause.operand): PAYLOAD_SCHEMA_BY_FIELD_DATA_TYPE[
+            FieldTypeConverter.convert_schema_field_type(type(clause.operand))
+        ]
+        for query_ in queries
+        for clause in query_.get_clauses_by_type(HardFilterClause)
+    }
+
+
+def create_payload_indexes(client: QdrantClient, name: str, fields: dict[str, PayloadSchemaType]) -> None:
+    """Index the payload fields the collection doesn't index with the same type yet."""
+    payload_schema = client.get_collection(name).payload_schema
+    for field_name, field_schema in fields.items():
+        if field_name in payload_schema and payload_schema[field_name].data_type == field_schema:
+            continue
+        logger.info("Creating {} payload index on {} in {}", field_schema.value, field_name, name)
+        client.create_payload_index(name, field_name, field_schema, wait=True)
+
+
+def provision_collection(client: QdrantClient, name: str, vectors: dict[str, VectorParams]) -> None:
+    """Create the collection with the configured HNSW, on-disk and quantization settings, or bring an
+    existing one in line with them.
+
+    The fields filtered on by the registered queries get payload indexes, before any point is written
+    to a new collection, so the HNSW graph is built with them. The vector sizes and distances of an
+    existing collection cannot change in place, a mismatch raises. If name is an alias, the
+    collection behind it is provisioned.
+    """
+    name = resolve_alias(client, name)
+    payload_fields = filtered_payload_fields(query.queries_by_name.values())
+    vectors = {
+        vector_name: VectorParams(size=params.size, distance=params.distance, on_disk=setting.QDRANT_ON_DISK_VECTORS)
+        for vector_name, params in vectors.items()
+    }
+    hnsw_config = HnswConfigDiff(m=setting.QDRANT_HNSW_M, ef_construct=setting.QDRANT_HNSW_EF_CONSTRUCT)
+    quantization = quantization_config()
+    if not client.collection_exists(name):
+        logger.info("Creating Qdrant collection {} with vectors {}", name, vectors)
+        client.create_collection(
+            collection_name=name,
+            vectors_config=vectors,
+            hnsw_config=hnsw_config,
+            quantization_config=quantization,
+        )
+        create_payload_indexes(client, name, payload_fields)
+        return
+
+    config = client.get_collection(name).config
+    existing_vectors = config.params.vectors if isinstance(config.params.vectors, dict) else {}
+    if mismatches := {
+        vector_name: existing_vectors.get(vector_name)
+        for vector_name, params in vectors.items()
+        if existing_vectors.get(vector_name) is None
+        or (existing_vectors[vector_name].size, existing_vectors[vector_name].distance) != (params.size, params.distance)
+    }:
+        raise ValueError(
+            f"Qdrant collection {name} has vectors {mismatches}, expected {vectors}. "
+            "Recreate it or use another QDRANT_COLLECTION_NAME."
+        )
+    create_payload_indexes(client, name, payload_fields)
+
+    vector_updates = {
+        vector_name: VectorParamsDiff(on_disk=params.on_disk)
+        for vector_name, params in vectors.items()
+        if bool(existing_vectors[vector_name].on_disk) != params.on_disk
+    }
+    hnsw_update = (
+        hnsw_config
+        if (config.hnsw_config.m, config.hnsw_config.ef_construct) != (hnsw_config.m, hnsw_config.ef_construct)
+        else None
+    )
+    quantization_update = (
+        (quantization or Disabled.DISABLED) if config.quantization_config != quantization else None
+    )
+    if not (vector_updates or hnsw_update or quantization_update):
+        logger.info("Qdrant collection {} is up to date", name)
+        return
+    logger.info(
+        "Updating Qdrant collection {}: vectors {}, hnsw {}, quantization {}",
+        name,
+        vector_updates,
+        hnsw_update,
+        quantization_update,
+    )
+    client.update_collection(
+        collection_name=name,
+        vectors_config=vector_updates or None,
+        hnsw_config=hnsw_update,
+        quantization_config=quantization_update,
+    )
+
+
+def provision_alias(client: QdrantClient, alias: str, vectors: dict[str, VectorParams]) -> str:
+    """Provision the collection behind alias and return its name.
+
+    If neither the alias nor a collection of that name exist yet, a first <alias>_<timestamp> version
+    is created and the alias pointed at it. A plain collection from before aliases is provisioned as is.
+    """
+    collection = resolve_alias(client, alias)
+    if client.collection_exists(collection):
+        provision_collection(client, collection, vectors)
+        return collection
+    collection = versioned_collection_name(alias)
+    provision_collection(client, collection, vectors)
+    swap_alias(client, alias, collection)
+    return collection
+
+
+class ProvisionedQdrantSearchIndexManager(QdrantSearchIndexManager):
+    """Provisions the collection with provision_alias instead of requiring an exact VectorParams
+    match, which the on-disk setting would break."""
+
+    def init_search_indices(
+        self,
+        index_configs: Sequence[IndexConfig],
+        collection_name: str,
+        override_existing: bool = False,
+    ) -> None:
+        self._validate_index_configs(index_configs)
+        if override_existing:
+            self._client.delete_collection(resolve_alias(self._client, collection_name))
+        collection_name = provision_alias(
+            self._client, collection_name, QdrantFieldDescriptorCompiler.create_vector_config(index_configs)
+        )
+        self._create_payload_indices(index_configs, collection_name)
+        self._index_configs.update({index_config.index_name: index_config for index_config in index_configs})
+
+
+class ProvisionedQdrantVDBConnector(QdrantVDBConnector):
+    """Writes to QDRANT_COLLECTION_NAME rather than a collection named after a hash of the index,
+    through the shared client of create_client."""
+
+    def __init__(self, connection_params: QdrantConnectionParams, vdb_settings: VDBSettings) -> None:
+        # QdrantVDBConnector.__init__ with the shared client instead of a default one per connector.
+        VDBConnector.__init__(self)
+        self._client = create_client()
+        self._encoder = QdrantFieldEncoder()
+        self._search = QdrantSearch(self._client, self._encoder)
+        self._vector_field_names = []
+        self._QdrantVDBConnector__vdb_settings = vdb_settings
+        self._provisioned_search_index_manager = ProvisionedQdrantSearchIndexManager(self._client)
+
+    def close_connection(self) -> None:
+        # The client outlives the connector, other connectors and the tools share it.
+        pass
+
+    @property
+    def collection_name(self) -> str:
+        return collection_name()
+
+    @property
+    def search_index_manager(self) -> SearchIndexManager:
+        return self._provisioned_search_index_manager
+
+
+class ProvisionedQdrantVectorDatabase(QdrantVectorDatabase):
+    @property
+    def _vdb_connector(self) -> QdrantVDBConnector:
+        return ProvisionedQdrantVDBConnector(self._connection_params, self._settings)
+
+
+def _encode_match_any_filter(
+    self: MatchAnyFilter, filter_: ComparisonOperation[Field], encoder: QdrantFieldEncoder
+) -> MatchAny:
+    # superlinked's version type checks the list of values instead of each value, which rejects every
+    # .in_ filter, e.g. filter_by_type.
+    values = filter_._other if isinstance(filter_._other, list) else [filter_._other]
+    if invalid := [type(value).__name__ for value in values if not isinstance(value, MatchAnyFilter.valid_types)]:
+        raise ValueError(f"Qdrant only supports int or str values in {MatchAny.__name__}, got {invalid}")
+    return MatchAny(any=[encoder.encode_field(FieldData.from_field(filter_._operand, value)) for value in values])
+
+
+MatchAnyFilter._encode_match_any_filter = _encode_match_any_filter
+
+
+def point_id(listing_id: str) -> str:
+    return QdrantVDBConnector._get_qdrant_id(EntityId(index.airbnb._schema_name, listing_id))
+
+
+def delete_listings(client: QdrantClient, listing_ids: Iterable[str]) -> int:
+    point_ids = [point_id(listing_id) for listing_id in listing_ids]
+    for start in range(0, len(point_ids), DELETE_BATCH_SIZE):
+        client.delete(
+            collection_name(),
+            points_selector=PointIdsList(points=point_ids[start : start + DELETE_BATCH_SIZE]),
+        )
+    return len(point_ids)
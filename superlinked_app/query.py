@@ -1,5 +1,6 @@
 from superlinked import framework as sl
-from superlinked_app import index
+from superlinked_app import constants, index
+from superlinked_app import nlq  # noqa: F401  # caches the parameters extracted from natural queries
 from superlinked_app.config import setting
 
 
@@ -35,6 +36,11 @@ amenities_param = sl.Param(
     description="The text in the user's query that is used to search in the listings' amenities."
     "Extract info that does not apply to other spaces or params.",
 )
+room_type_param = sl.Param(
+    "filter_by_type",
+    description="The room types the user is looking for, listings of any of them match.",
+    options=constants.ROOM_TYPES,
+)
 
 base_query = (
     sl.Query(
@@ -49,7 +55,7 @@ base_query = (
     .find(index.airbnb)
     .with_natural_query(sl.Param("natural_query"), openai_config)
     .filter(
-        index.airbnb.room_type == sl.Param("filter_by_type", options=['Private room', 'Entire home/apt', 'Shared room', 'Hotel room']),
+        index.airbnb.room_type.in_(room_type_param),
     )
     .limit(sl.Param("limit"))
     #.select_all()
@@ -67,9 +73,6 @@ filter_query = (
         amenities_param,
         sl.Param("amenities_similar_clause_weight"),
     )
-    .filter(
-        index.airbnb.room_type == sl.Param("filter_by_type", options=['Private room', 'Entire home/apt', 'Shared room', 'Hotel room']),
-    )
     .filter(
         index.airbnb.review_scores_rating >= sl.Param("review_rating_bigger_than",
                                                       description="Used to find listings with a review rating bigger than the provided number.",)
@@ -78,6 +81,10 @@ filter_query = (
         index.airbnb.price <= sl.Param("price_smaller_than",
                                        description="Used to find listings with a price smaller than the provided number.",)
     )
+    .filter(
+        index.airbnb.price >= sl.Param("price_bigger_than",
+                                       description="Used to find listings with a price bigger than the provided number.",)
+    )
     #.select_all()
 )
 
@@ -104,4 +111,11 @@ semantic_query = (
                                        description="Used to find listings with a price smaller than the provided number.",)
     )
     #.select_all()
-)
\ No newline at end of file
+)
+
+# The RestQuery endpoint each query is served under.
+queries_by_name = {
+    "filter_query": filter_query,
+    "base_query": base_query,
+    "semantic_search_query": semantic_query,
+}
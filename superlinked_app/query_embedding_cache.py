@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from threading import Lock
+
+from loguru import logger
+from superlinked.framework.common.data_types import Vector
+
+
+class QueryEmbeddingCache:
+    """LRU cache of the vectors of query texts, keyed by model and text.
+
+    Kept apart from the embedding cache ingestion fills, so a large load can't evict the short texts
+    queries repeat all day.
+    """
+
+    def __init__(self, max_entries: int, log_interval: int = 1000) -> None:
+        self._max_entries = max_entries
+        self._log_interval = log_interval
+        self._entries: OrderedDict[tuple[str, str], Vector] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def embed(
+        self,
+        model_name: str,
+        texts: Sequence[str],
+        embed_texts: Callable[[Sequence[str]], list[Vector]],
+    ) -> list[Vector]:
+        """The vectors of texts, running embed_texts once for the ones that are not cached.
+
+        The metrics are logged every log_interval lookups.
+        """
+        vectors: dict[str, Vector] = {}
+        with self._lock:
+            lookups_before = self.hits + self.misses
+            for text in texts:
+                vector = self._entries.get((model_name, text))
+                if vector is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end((model_name, text))
+                self.hits += 1
+                vectors[text] = vector
+            log_stats = (self.hits + self.misses) // self._log_interval != lookups_before // self._log_interval
+        if log_stats:
+            self.log_stats()
+        missing = [text for text in dict.fromkeys(texts) if text not in vectors]
+        if missing:
+            new_vectors = embed_texts(missing)
+            vectors.update(zip(missing, new_vectors))
+            with self._lock:
+                for text, vector in zip(missing, new_vectors):
+                    self._entries[(model_name, text)] = vector
+                    self._entries.move_to_end((model_name, text))
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return [vectors[text] for text in texts]
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hit_rate,
+            }
+
+    def log_stats(self) -> None:
+        logger.info("Query embedding cache: {}", self.stats())
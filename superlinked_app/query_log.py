@@ -0,0 +1,64 @@
+import json
+import time
+from collections import deque
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from loguru import logger
+from superlinked.framework.dsl.executor.rest.rest_handler import RestHandler
+
+from superlinked_app import nlq
+from superlinked_app.config import setting
+
+
+class QueryLog:
+    """Appends the params of every REST query to a JSONL file, so recent traffic can be replayed.
+
+    Once the file grows past max_bytes it is moved to <path>.1, which keeps at most two files around.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._rotated_path = self._path.with_name(self._path.name + ".1")
+        self._max_bytes = max_bytes
+        self._lock = Lock()
+
+    def append(self, query_name: str, params: dict[str, Any]) -> None:
+        self.write({"timestamp": time.time(), "query_name": query_name, "params": params})
+
+    def write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if self._path.exists() and self._path.stat().st_size > self._max_bytes:
+                self._path.replace(self._rotated_path)
+            with self._path.open("a", encoding="utf-8") as log:
+                log.write(line + "\n")
+
+    def recent(self, count: int) -> list[dict[str, Any]]:
+        """The last count queries, oldest first."""
+        queries: deque[dict[str, Any]] = deque(maxlen=count)
+        for path in (self._rotated_path, self._path):
+            if path.exists():
+                with path.open(encoding="utf-8") as log:
+                    queries.extend(json.loads(line) for line in log if line.strip())
+        return list(queries)
+
+
+query_log = QueryLog(setting.QUERY_LOG_PATH, setting.QUERY_LOG_MAX_MB * 1024 * 1024) if setting.QUERY_LOG_PATH else None
+
+_query_handler = RestHandler._query_handler
+
+
+def _logged_query_handler(self: RestHandler, query_descriptor: dict, path: str):
+    result = _query_handler(self, query_descriptor, path)
+    # Logged resolved, so a replay doesn't parse the natural query again.
+    params = nlq.resolved_params(result.query_descriptor, query_descriptor)
+    query_log.append(path.rstrip("/").rsplit("/", 1)[-1], params)
+    return result
+
+
+if query_log is not None:
+    RestHandler._query_handler = _logged_query_handler
+    logger.info("Logging REST queries to {}", setting.QUERY_LOG_PATH)
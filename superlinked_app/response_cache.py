@@ -0,0 +1,230 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Any
+
+import requests
+from fastapi import FastAPI, Request, Response, status
+from loguru import logger
+from superlinked.framework.dsl.app.rest.rest_app import RestApp
+from superlinked.framework.online.source.online_source import OnlineSource
+from superlinked.server.middleware import lifespan_event
+from superlinked.server.util.fast_api_handler import FastApiHandler
+
+from superlinked_app import metrics  # noqa: F401  # wraps FastApiHandler.query before the cache does
+from superlinked_app import query
+from superlinked_app.config import setting
+from superlinked_app.nlq_cache import normalize_query
+
+# Log the cache metrics every this many lookups.
+STATS_LOG_INTERVAL = 1000
+
+INVALIDATE_ENDPOINT = "/api/v1/response-cache/invalidate"
+
+# The value every parameter of a query endpoint takes when a request leaves it out.
+DEFAULT_PARAMS = {
+    query_name: {info.name: info.value for info in query_descriptor.calculate_param_infos()}
+    for query_name, query_descriptor in query.queries_by_name.items()
+}
+
+
+def response_key(query_name: str, payload: dict[str, Any]) -> str:
+    """Requests that resolve to the same parameters of the same endpoint share a key, whether they
+    spell out the defaults or not."""
+    params = {**DEFAULT_PARAMS.get(query_name, {}), **payload}
+    if isinstance(params.get("natural_query"), str):
+        params["natural_query"] = normalize_query(params["natural_query"])
+    resolved = json.dumps([query_name, params], sort_keys=True, default=str)
+    return hashlib.sha256(resolved.encode("utf-8")).hexdigest()
+
+
+class LocalResponseCache:
+    """LRU cache with a TTL for response bodies, in process.
+
+    Entries are stored under the generation current when their query started. invalidate moves to a
+    new generation, so a response computed while data was being written is never served.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generation = 0
+        self._lock = Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str, generation: int) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(f"{generation}:{key}")
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self._ttl_seconds:
+                del self._entries[f"{generation}:{key}"]
+                return None
+            self._entries.move_to_end(f"{generation}:{key}")
+            return entry[1]
+
+    def put(self, key: str, generation: int, body: bytes) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[f"{generation}:{key}"] = (time.monotonic(), body)
+            self._entries.move_to_end(f"{generation}:{key}")
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+class RedisResponseCache:
+    """Response bodies in Redis, shared by every server replica and by the loading tools.
+
+    The generation is a Redis counter, so an invalidation in any process applies to all of them.
+    Entries expire after ttl_seconds; bound the memory with Redis' maxmemory and allkeys-lru.
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "airbnb_search:response") -> None:
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._ttl_ms = int(ttl_seconds * 1000)
+        self._prefix = prefix
+
+    def generation(self) -> int:
+        return int(self._redis.get(f"{self._prefix}:generation") or 0)
+
+    def get(self, key: str, generation: int) -> bytes | None:
+        return self._redis.get(f"{self._prefix}:{generation}:{key}")
+
+    def put(self, key: str, generation: int, body: bytes) -> None:
+        if generation != self.generation():
+            return
+        self._redis.set(f"{self._prefix}:{generation}:{key}", body, px=self._ttl_ms)
+
+    def invalidate(self) -> None:
+        self._redis.incr(f"{self._prefix}:generation")
+
+
+class ResponseCacheStats:
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def log_stats(self) -> None:
+        logger.info("Response cache: {}", self.stats())
+
+
+if setting.RESPONSE_CACHE_BACKEND == "redis":
+    response_cache = RedisResponseCache(setting.RESPONSE_CACHE_REDIS_URL, setting.RESPONSE_CACHE_TTL_SECONDS)
+elif setting.RESPONSE_CACHE_BACKEND == "local":
+    response_cache = LocalResponseCache(setting.RESPONSE_CACHE_SIZE, setting.RESPONSE_CACHE_TTL_SECONDS)
+else:
+    response_cache = None
+response_cache_stats = ResponseCacheStats()
+
+
+def invalidate() -> None:
+    if response_cache is not None:
+        response_cache.invalidate()
+
+
+def invalidate_server(api_url: str) -> None:
+    """Empty the response cache of the server at api_url, for tools that change the data behind its back.
+
+    A redis cache is shared, so it is emptied from here. A local one lives in the server process and is
+    emptied through its invalidation endpoint. A server that isn't running has nothing cached.
+    """
+    if setting.RESPONSE_CACHE_BACKEND == "redis":
+        invalidate()
+    elif setting.RESPONSE_CACHE_BACKEND == "local":
+        try:
+            requests.post(f"{api_url}{INVALIDATE_ENDPOINT}", timeout=30).raise_for_status()
+        except requests.ConnectionError:
+            logger.info("No server at {}, no cached responses to invalidate", api_url)
+
+
+def invalidate_on_put(*sources: OnlineSource) -> None:
+    """Invalidate the cached responses every time one of sources has written new data."""
+    for source in sources:
+        put = source.put
+
+        @wraps(put)
+        def invalidating_put(data, put=put) -> None:
+            try:
+                put(data)
+            finally:
+                invalidate()
+
+        source.put = invalidating_put
+
+
+_query = FastApiHandler.query
+
+
+async def _cached_query(self: FastApiHandler, request: Request) -> Response:
+    if request.headers.get("x-debug-mode", "false").lower() == "true":
+        return await _query(self, request)
+    # Starlette keeps the body on the request, the handler reads it again on a miss.
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        # Not a set of params, left to the handler to reject.
+        return await _query(self, request)
+    key = response_key(request.url.path.rstrip("/").rsplit("/", 1)[-1], payload)
+    generation = response_cache.generation()
+    body = response_cache.get(key, generation)
+    if body is not None:
+        response_cache_stats.hits += 1
+        response = Response(content=body, media_type="application/json")
+    else:
+        response_cache_stats.misses += 1
+        response = await _query(self, request)
+        if response.status_code == 200:
+            response_cache.put(key, generation, response.body)
+    if (response_cache_stats.hits + response_cache_stats.misses) % STATS_LOG_INTERVAL == 0:
+        response_cache_stats.log_stats()
+    return response
+
+
+async def _invalidate(_: Request) -> Response:
+    invalidate()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+_register_routes = lifespan_event._register_routes
+
+
+def _register_routes_with_invalidation(app: FastAPI, rest_app: RestApp) -> None:
+    _register_routes(app, rest_app)
+    if not any(getattr(route, "path", None) == INVALIDATE_ENDPOINT for route in app.routes):
+        app.add_api_route(path=INVALIDATE_ENDPOINT, endpoint=_invalidate, methods=["POST"])
+        logger.info("Registered response cache invalidation endpoint {}", INVALIDATE_ENDPOINT)
+
+
+if response_cache is not None:
+    lifespan_event._register_routes = _register_routes_with_invalidation
+    # Wraps the query metrics.py already timed, so the search metrics only count cache misses.
+    FastApiHandler.query = _cached_query
+    logger.info(
+        "Caching query responses: {} backend, {}s TTL",
+        setting.RESPONSE_CACHE_BACKEND,
+        setting.RESPONSE_CACHE_TTL_SECONDS,
+    )
@@ -0,0 +1,160 @@
+import random
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+from superlinked.framework.dsl.query.query_descriptor import QueryDescriptor
+
+from superlinked_app.config import setting
+from superlinked_app.query_log import QueryLog
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread, counting identical stacks.
+
+    It sees whatever that thread runs, not one request. On the server's event loop thread, the
+    coroutines of concurrent requests are sampled too, so a profile taken under load mixes them in.
+
+    The profile is written in the collapsed format flamegraph.pl and speedscope read: one line per
+    stack, outermost frame first, followed by the number of samples.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float) -> None:
+        self._thread_id = thread_id
+        self._interval_s = interval_s
+        self._stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval_s):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        """Stop sampling without waiting for the sampling thread, which finishes within an interval."""
+        self._stopped.set()
+
+    def write(self, path: Path) -> None:
+        self._thread.join()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in self._stacks.items()), encoding="utf-8")
+
+
+class SlowQueryLog:
+    """Writes the query endpoint requests that took longer than threshold_ms to a JSONL file.
+
+    A profile_rate share of requests is sampled while it runs. Only the profiles of the requests that
+    turn out slow are kept, next to the log in profile_dir, and the log entry points to them. The
+    profiles and log entries are written from a background thread, so record doesn't block the event
+    loop on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        threshold_ms: float,
+        profile_rate: float,
+        profile_interval_ms: float,
+        profile_dir: str,
+    ) -> None:
+        self._log = QueryLog(path, max_bytes)
+        self._threshold_s = threshold_ms / 1000
+        self._profile_rate = profile_rate
+        self._profile_interval_s = profile_interval_ms / 1000
+        self._profile_dir = Path(profile_dir)
+        # One writer keeps the log lines in order.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-log")
+
+    def start_sampler(self) -> StackSampler | None:
+        """A sampler of the current thread for a profile_rate share of calls, None for the others."""
+        if random.random() >= self._profile_rate:
+            return None
+        return StackSampler(threading.get_ident(), self._profile_interval_s).start()
+
+    def record(
+        self,
+        query_name: str,
+        seconds: float,
+        query_descriptor: QueryDescriptor | None,
+        stage_seconds: dict[str, float],
+        result_count: int | None,
+        sampler: StackSampler | None,
+    ) -> None:
+        if sampler is not None:
+            sampler.stop()
+        if seconds < self._threshold_s:
+            return
+        logger.warning("Slow search {} took {:.0f} ms", query_name, seconds * 1000)
+        self._writer.submit(
+            self._write,
+            datetime.now(timezone.utc),
+            query_name,
+            seconds,
+            query_descriptor,
+            stage_seconds,
+            result_count,
+            sampler,
+        )
+
+    def _write(
+        self,
+        timestamp: datetime,
+        query_name: str,
+        seconds: float,
+        query_descriptor: QueryDescriptor | None,
+        stage_seconds: dict[str, float],
+        result_count: int | None,
+        sampler: StackSampler | None,
+    ) -> None:
+        profile_path = None
+        if sampler is not None:
+            profile_path = self._profile_dir / f"{timestamp:%Y%m%dT%H%M%S%f}_{query_name}.folded"
+            sampler.write(profile_path)
+        self._log.write(
+            {
+                "timestamp": timestamp.isoformat(),
+                "query_name": query_name,
+                "ms": seconds * 1000,
+                "stage_ms": {stage: stage_s * 1000 for stage, stage_s in stage_seconds.items()},
+                "result_count": result_count,
+                # Resolved after the natural query was parsed, so they hold what the LLM extracted.
+                "params": query_descriptor.calculate_value_by_param_name() if query_descriptor is not None else None,
+                "profile": str(profile_path) if profile_path is not None else None,
+            }
+        )
+
+
+slow_query_log = (
+    SlowQueryLog(
+        setting.SLOW_QUERY_LOG_PATH,
+        setting.QUERY_LOG_MAX_MB * 1024 * 1024,
+        setting.SLOW_QUERY_THRESHOLD_MS,
+        setting.SLOW_QUERY_PROFILE_RATE,
+        setting.SLOW_QUERY_PROFILE_INTERVAL_MS,
+        setting.SLOW_QUERY_PROFILE_DIR,
+    )
+    if setting.SLOW_QUERY_LOG_PATH
+    else None
+)
+if slow_query_log is not None:
+    if not setting.METRICS_ENABLED:
+        logger.warning("SLOW_QUERY_LOG_PATH is set but METRICS_ENABLED is not, no searches will be logged")
+    else:
+        logger.info(
+            "Logging searches slower than {} ms to {}", setting.SLOW_QUERY_THRESHOLD_MS, setting.SLOW_QUERY_LOG_PATH
+        )
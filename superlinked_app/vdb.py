@@ -1,7 +1,12 @@
+from pathlib import Path
+
 import superlinked.framework as sl
 from loguru import logger
 
-from superlinked_app import index, query
+from superlinked_app import embedding, index, ingestion, nlq, qdrant, query
+from superlinked_app import batch_search  # noqa: F401  # adds a /batch variant of every query endpoint
+from superlinked_app import query_log  # noqa: F401  # logs REST queries to replay against new collections
+from superlinked_app import metrics, response_cache
 from superlinked_app import setting
 
 
@@ -9,16 +14,30 @@ airbnb_source: sl.RestSource = sl.RestSource(index.airbnb)
 
 logger.info("Data loader will load data from: %s", setting.DATA_PATH)
 
+ingestion_batch_size = ingestion.resolve_batch_size()
+
 airbnb_data_loader_parser: sl.DataFrameParser = sl.DataFrameParser(
     schema=index.airbnb,
     mapping={index.airbnb.id: "id"}
     )
 
-airbnb_data_loader_config: sl.DataLoaderConfig = sl.DataLoaderConfig(
-    str(setting.DATA_PATH),
-    sl.DataFormat.CSV,
-    pandas_read_kwargs={"chunksize": 100},
-)
+if Path(setting.DATA_PATH).suffix == ".parquet":
+    # The server's data loader reads a Parquet file with pd.read_parquet, which has no chunksize, so the
+    # whole file is held in memory. make load-data-bulk streams it row group by row group instead.
+    logger.warning(
+        "The data loader reads {} in a single pass, point DATA_PATH at a CSV file or use make load-data-bulk",
+        setting.DATA_PATH,
+    )
+    airbnb_data_loader_config: sl.DataLoaderConfig = sl.DataLoaderConfig(
+        str(setting.DATA_PATH),
+        sl.DataFormat.PARQUET,
+    )
+else:
+    airbnb_data_loader_config = sl.DataLoaderConfig(
+        str(setting.DATA_PATH),
+        sl.DataFormat.CSV,
+        pandas_read_kwargs={"chunksize": ingestion_batch_size},
+    )
 
 airbnb_loader_source: sl.DataLoaderSource = sl.DataLoaderSource(
     index.airbnb,
@@ -26,12 +45,16 @@ airbnb_loader_source: sl.DataLoaderSource = sl.DataLoaderSource(
     parser=airbnb_data_loader_parser,
 )
 
+# Registered before the executor runs so it sees each batch ahead of the index's data processor.
+text_embedding_prefetcher = embedding.TextEmbeddingPrefetcher([index.description_space, index.amenities_space])
+airbnb_source.register(text_embedding_prefetcher)
+airbnb_loader_source.register(text_embedding_prefetcher)
+
 if setting.USE_QDRANT_VECTOR_DB:
     logger.info("Using Qdrant vector database")
-    vector_database = sl.QdrantVectorDatabase(
+    vector_database = qdrant.ProvisionedQdrantVectorDatabase(
         setting.QDRANT_CLUSTER_URL.get_secret_value(),
         setting.QDRANT_API_KEY.get_secret_value(),
-        collection_name='airbnb_semantic_search',
     )
     
 else:
@@ -39,14 +62,19 @@ else:
     vector_database = sl.InMemoryVectorDatabase()
     
 
+response_cache.invalidate_on_put(airbnb_source, airbnb_loader_source)
+metrics.instrument_ingestion(airbnb_source, "rest")
+metrics.instrument_ingestion(airbnb_loader_source, "data_loader")
+metrics.register_caches(
+    natural_query=nlq.nlq_cache,
+    query_embedding=embedding.query_embedding_cache,
+    response=response_cache.response_cache_stats,
+)
+
 executor = sl.RestExecutor(
     sources=[airbnb_source, airbnb_loader_source],
     indices=[index.airbnb_index],
-    queries=[
-        sl.RestQuery(sl.RestDescriptor("filter_query"), query.filter_query),
-        sl.RestQuery(sl.RestDescriptor("base_query"), query.base_query),
-        sl.RestQuery(sl.RestDescriptor("semantic_search_query"), query.semantic_query),
-    ],
+    queries=[sl.RestQuery(sl.RestDescriptor(name), query_) for name, query_ in query.queries_by_name.items()],
     vector_database=vector_database,
 )
 
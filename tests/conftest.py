@@ -0,0 +1,5 @@
+import os
+
+# Settings() requires these. The tests never reach OpenAI or Qdrant.
+for name in ("OPENAI_API_KEY", "QDRANT_API_KEY", "QDRANT_CLUSTER_URL"):
+    os.environ.setdefault(name, "test")
@@ -0,0 +1,59 @@
+import pytest
+
+sl = pytest.importorskip("superlinked.framework")
+pytest.importorskip("fastapi")
+
+from superlinked.framework.common.exception import QueryException  # noqa: E402
+
+from superlinked_app import batch_search, query  # noqa: E402
+
+
+class Listing(sl.Schema):
+    id: sl.IdField
+    price: sl.Float
+
+
+listing = Listing()
+price_space = sl.NumberSpace(number=listing.price, min_value=0.0, max_value=1000.0, mode=sl.Mode.MINIMUM)
+listing_index = sl.Index([price_space], fields=[listing.price])
+price_query = (
+    sl.Query(listing_index)
+    .find(listing)
+    .filter(listing.price <= sl.Param("price_smaller_than"))
+    .limit(sl.Param("limit"))
+)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setitem(query.queries_by_name, "price_query", price_query)
+    source = sl.InMemorySource(listing)
+    app = sl.InMemoryExecutor(sources=[source], indices=[listing_index]).run()
+    source.put([{"id": "cheap", "price": 50.0}, {"id": "mid", "price": 300.0}, {"id": "dear", "price": 900.0}])
+    return app
+
+
+def test_answers_every_param_set_in_order(app):
+    responses = batch_search.search_batch(
+        app, "price_query", [{"price_smaller_than": 500.0, "limit": 10}, {"price_smaller_than": 100.0, "limit": 10}]
+    )
+    assert [[entry["entity"]["id"] for entry in response["results"]] for response in responses] == [
+        ["cheap", "mid"],
+        ["cheap"],
+    ]
+
+
+def test_a_failed_entry_does_not_fail_the_batch(app, monkeypatch):
+    resolve_params = batch_search.resolve_params
+
+    def failing_resolve_params(query_name, query_descriptor, params):
+        if params["price_smaller_than"] is None:
+            raise QueryException("Error executing natural language query.")
+        return resolve_params(query_name, query_descriptor, params)
+
+    monkeypatch.setattr(batch_search, "resolve_params", failing_resolve_params)
+    responses = batch_search.search_batch(
+        app, "price_query", [{"price_smaller_than": None, "limit": 10}, {"price_smaller_than": 100.0, "limit": 10}]
+    )
+    assert responses[0] == {"error": "Error executing natural language query."}
+    assert [entry["entity"]["id"] for entry in responses[1]["results"]] == ["cheap"]
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("superlinked")
+
+from superlinked_app import delta, setting  # noqa: E402
+
+LISTINGS = pd.DataFrame(
+    {
+        "id": ["1", "2", "3"],
+        "name": ["Loft", "Cabin", "Studio"],
+        "description": ["Bright loft", "Quiet cabin", None],
+        "bedrooms": [1.0, 2.0, None],
+        "beds": [1.0, 3.0, 1.0],
+        "bathrooms": [1.0, 1.5, 1.0],
+        "bathrooms_text": ["1 bath", "1.5 baths", "1 bath"],
+        "review_scores_rating": [4.8, 4.2, None],
+        "host_is_superhost": [1, 0, 0],
+        "price": [120.0, 90.0, 60.0],
+        "amenities": ['["Wifi"]', '["Sauna"]', "[]"],
+        "number_of_reviews": [10, 3, 0],
+        "room_type": ["Entire home/apt", "Entire home/apt", "Private room"],
+        "listing_url": ["https://a", "https://b", "https://c"],
+    }
+)
+
+
+def write_listings(path, listings: pd.DataFrame) -> None:
+    listings.to_csv(path, index=False)
+
+
+def read(path) -> pd.DataFrame:
+    return pd.concat(delta.read_listings(str(path), 2))
+
+
+def test_fingerprint_ignores_the_chunk_a_listing_lands_in(tmp_path):
+    write_listings(tmp_path / "listings.csv", LISTINGS)
+    whole = delta.fingerprint(read(tmp_path / "listings.csv"))
+    chunked = pd.concat(delta.fingerprint(chunk) for chunk in delta.read_listings(str(tmp_path / "listings.csv"), 1))
+    assert whole.to_dict() == chunked.to_dict()
+
+
+@pytest.mark.parametrize(("column", "value"), [("price", 121.0), ("description", "Renovated loft"), ("beds", None)])
+def test_fingerprint_changes_with_any_stored_field(tmp_path, column, value):
+    changed = LISTINGS.copy()
+    changed.loc[0, column] = value
+    write_listings(tmp_path / "before.csv", LISTINGS)
+    write_listings(tmp_path / "after.csv", changed)
+    before = delta.fingerprint(read(tmp_path / "before.csv"))
+    after = delta.fingerprint(read(tmp_path / "after.csv"))
+    assert before["1"] != after["1"]
+    assert before.drop("1").to_dict() == after.drop("1").to_dict()
+
+
+def test_fingerprint_store_round_trip(tmp_path):
+    store = delta.FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    store.upsert(pd.Series([1, -2], index=["1", "2"]))
+    store.upsert(pd.Series([3], index=["2"]))
+    store.delete(["1"])
+    assert delta.FingerprintStore(str(tmp_path / "fingerprints.sqlite")).load() == {"2": 3}
+
+
+@pytest.fixture
+def delta_run(tmp_path, monkeypatch):
+    pytest.importorskip("fastapi")
+    from superlinked_app import qdrant, response_cache
+    from tools import delta_ingest
+
+    monkeypatch.setattr(setting, "DATA_PATH", str(tmp_path / "listings.csv"))
+    monkeypatch.setattr(setting, "DELTA_FINGERPRINT_PATH", str(tmp_path / "fingerprints.sqlite"))
+    monkeypatch.setattr(setting, "USE_QDRANT_VECTOR_DB", True)
+    calls: dict = {}
+
+    def ingest(session, api_url, listings):
+        calls["ingested"].extend(listings["id"])
+
+    def delete_listings(client, listing_ids):
+        calls["deleted"].extend(listing_ids)
+        return len(listing_ids)
+
+    def invalidate_server(api_url):
+        calls["invalidated"] += 1
+
+    monkeypatch.setattr(delta_ingest, "ingest", ingest)
+    monkeypatch.setattr(qdrant, "create_client", lambda: None)
+    monkeypatch.setattr(qdrant, "delete_listings", delete_listings)
+    monkeypatch.setattr(response_cache, "invalidate_server", invalidate_server)
+
+    def run(listings: pd.DataFrame, record_only: bool = False) -> dict:
+        calls.update(ingested=[], deleted=[], invalidated=0)
+        write_listings(tmp_path / "listings.csv", listings)
+        delta_ingest.run("http://server", 2, record_only)
+        return calls
+
+    return run
+
+
+def test_first_run_sends_every_listing(delta_run):
+    calls = delta_run(LISTINGS)
+    assert sorted(calls["ingested"]) == ["1", "2", "3"]
+    assert calls["deleted"] == []
+
+
+def test_unchanged_listings_are_not_sent_again(delta_run):
+    delta_run(LISTINGS)
+    calls = delta_run(LISTINGS)
+    assert calls["ingested"] == []
+    assert calls["deleted"] == []
+    assert calls["invalidated"] == 0
+
+
+def test_sends_changed_and_added_listings_and_deletes_removed_ones(delta_run):
+    delta_run(LISTINGS)
+    listings = LISTINGS.copy()
+    listings.loc[1, "price"] = 95.0
+    added = LISTINGS.iloc[[0]].assign(id="4")
+    listings = pd.concat([listings.drop(index=2), added], ignore_index=True)
+    calls = delta_run(listings)
+    assert sorted(calls["ingested"]) == ["2", "4"]
+    assert calls["deleted"] == ["3"]
+    assert calls["invalidated"] == 1
+    # The next run starts from what this one recorded.
+    calls = delta_run(listings)
+    assert calls["ingested"] == []
+    assert calls["deleted"] == []
+
+
+def test_record_only_sends_nothing(delta_run):
+    calls = delta_run(LISTINGS, record_only=True)
+    assert calls["ingested"] == []
+    assert delta_run(LISTINGS)["ingested"] == []
@@ -0,0 +1,59 @@
+import time
+
+import pandas as pd
+
+from superlinked_app import ingestion
+
+
+class StubSource:
+    """Puts take a fixed time whatever their size, and each keeps growth_mb[rows] of memory."""
+
+    def __init__(self, growth_mb: dict[int, float]) -> None:
+        self.growth_mb = growth_mb
+        self.rss_mb = 500.0
+        self.put_rows: list[int] = []
+
+    def put(self, data: list[pd.DataFrame]) -> None:
+        rows = len(data[0])
+        self.put_rows.append(rows)
+        self.rss_mb += self.growth_mb[rows]
+        time.sleep(0.02)
+
+
+def sample(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"id": range(rows)})
+
+
+def test_warm_up_is_not_charged_to_the_first_candidate(monkeypatch):
+    # The warm-up loads a model far bigger than the budget.
+    source = StubSource({ingestion.WARMUP_ROWS: 1700.0, 10: 5.0, 20: 10.0, 40: 20.0})
+    monkeypatch.setattr(ingestion, "current_rss_mb", lambda: source.rss_mb)
+    batch_size = ingestion.measure_batch_sizes(source, sample(ingestion.WARMUP_ROWS + 70), [40, 10, 20], 100)
+    assert source.put_rows == [ingestion.WARMUP_ROWS, 10, 20, 40]
+    assert batch_size == 40
+
+
+def test_stops_at_the_first_candidate_over_budget(monkeypatch):
+    source = StubSource({ingestion.WARMUP_ROWS: 1700.0, 10: 5.0, 20: 150.0, 40: 20.0})
+    monkeypatch.setattr(ingestion, "current_rss_mb", lambda: source.rss_mb)
+    assert ingestion.measure_batch_sizes(source, sample(ingestion.WARMUP_ROWS + 70), [10, 20, 40], 100) == 10
+    assert source.put_rows == [ingestion.WARMUP_ROWS, 10, 20]
+
+
+def test_growth_is_measured_while_the_put_runs(monkeypatch):
+    rss_mb = 500.0
+    monkeypatch.setattr(ingestion, "current_rss_mb", lambda: rss_mb)
+
+    def put() -> None:
+        nonlocal rss_mb
+        rss_mb += 300.0
+        time.sleep(0.1)
+        rss_mb -= 300.0
+
+    assert ingestion.rss_growth_mb(put) == 300.0
+
+
+def test_short_sample_measures_nothing(monkeypatch):
+    source = StubSource({ingestion.WARMUP_ROWS: 0.0})
+    monkeypatch.setattr(ingestion, "current_rss_mb", lambda: source.rss_mb)
+    assert ingestion.measure_batch_sizes(source, sample(ingestion.WARMUP_ROWS + 5), [10], 100) is None
@@ -0,0 +1,16 @@
+from superlinked_app.nlq_backend import NLQRecorder, NLQReplay
+
+
+def test_replays_recorded_params_for_the_same_normalized_query(tmp_path):
+    path = str(tmp_path / "recordings.jsonl")
+    NLQRecorder(path).record("Cozy loft  under 300", "filter_query", "gpt-4o", {"price_smaller_than": 300.0})
+    replay = NLQReplay(path, latency_ms=0)
+    assert replay.query("cozy loft under 300", "filter_query", "gpt-4o") == {"price_smaller_than": 300.0}
+    assert replay.query("cozy loft under 300", "base_query", "gpt-4o") == {}
+    assert (replay.hits, replay.misses) == (1, 1)
+
+
+def test_missing_recordings_replay_nothing(tmp_path):
+    replay = NLQReplay(str(tmp_path / "missing.jsonl"), latency_ms=0)
+    assert replay.query("cozy loft under 300", "filter_query", "gpt-4o") == {}
+    assert replay.misses == 1
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+
+from superlinked_app.nlq_cache import NLQueryCache, cache_key
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert cache_key("Cozy  LOFT under 300", "filter_query", "gpt-4o") == cache_key(
+        "cozy loft under 300", "filter_query", "gpt-4o"
+    )
+
+
+def test_cache_key_depends_on_the_params_the_request_set():
+    bare = cache_key("cozy loft under 300", "filter_query", "gpt-4o")
+    with_price = cache_key("cozy loft under 300", "filter_query", "gpt-4o", set_params={"price_smaller_than": 500})
+    assert bare != with_price
+    assert with_price != cache_key(
+        "cozy loft under 300", "filter_query", "gpt-4o", set_params={"price_smaller_than": 300}
+    )
+    assert cache_key(
+        "cozy loft", "filter_query", "gpt-4o", set_params={"price_smaller_than": 500, "limit": 10}
+    ) == cache_key("cozy loft", "filter_query", "gpt-4o", set_params={"limit": 10, "price_smaller_than": 500})
+
+
+def test_cache_expires_entries(monkeypatch):
+    cache = NLQueryCache(max_entries=10, ttl_seconds=60)
+    now = 1000.0
+    monkeypatch.setattr("superlinked_app.nlq_cache.time.time", lambda: now)
+    cache.put("key", {"price_smaller_than": 300})
+    assert cache.get("key") == {"price_smaller_than": 300}
+    now += 61
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_survives_restart_with_a_path(tmp_path):
+    path = str(tmp_path / "nlq_cache.sqlite")
+    NLQueryCache(max_entries=10, ttl_seconds=60, path=path).put("key", {"filter_by_type": ["Private room"]})
+    cache = NLQueryCache(max_entries=10, ttl_seconds=60, path=path)
+    assert cache.get("key") == {"filter_by_type": ["Private room"]}
+    assert cache.disk_hits == 1
+
+
+def test_evaluator_does_not_replay_params_extracted_for_other_set_params(monkeypatch):
+    pytest.importorskip("superlinked")
+    from superlinked.framework.dsl.query.query_param_information import ParamInfo
+
+    from superlinked_app import nlq
+
+    monkeypatch.setattr(nlq, "nlq_cache", NLQueryCache(max_entries=10, ttl_seconds=60))
+    extracted_for = []
+
+    def extract_params(self, natural_query, client_config, system_prompt):
+        unset = sorted(info.name for info in self._param_infos if info.name not in self._set_params())
+        extracted_for.append(unset)
+        return {"price_smaller_than": 300.0} if "price_smaller_than" in unset else {}
+
+    monkeypatch.setattr(nlq.CachedNLQParamEvaluator, "_extract_params", extract_params)
+    client_config = SimpleNamespace(model="gpt-4o")
+    token = nlq.current_query_name.set("filter_query")
+    try:
+        with_price = nlq.CachedNLQParamEvaluator(
+            [ParamInfo("price_smaller_than", None, 500.0, False), ParamInfo("limit", None, None, False)]
+        ).evaluate_param_infos("cozy loft under 300", client_config)
+        bare = nlq.CachedNLQParamEvaluator(
+            [ParamInfo("price_smaller_than", None, None, False), ParamInfo("limit", None, None, False)]
+        ).evaluate_param_infos("cozy loft under 300", client_config)
+        bare_again = nlq.CachedNLQParamEvaluator(
+            [ParamInfo("price_smaller_than", None, None, False), ParamInfo("limit", None, None, False)]
+        ).evaluate_param_infos("cozy loft under 300", client_config)
+    finally:
+        nlq.current_query_name.reset(token)
+
+    assert with_price == {}
+    assert bare == bare_again == {"price_smaller_than": 300.0}
+    assert extracted_for == [["limit"], ["limit", "price_smaller_than"]]
@@ -0,0 +1,88 @@
+import pytest
+
+from superlinked_app import nlq_rules
+
+PARAMS = ["price_smaller_than", "review_rating_bigger_than", "filter_by_type"]
+
+
+def test_reads_every_filter_and_keeps_the_rest():
+    rule_parse = nlq_rules.parse(
+        "Entire apartment in Sodermalm with price lower than 1,000 and rating bigger than 4.5.", PARAMS
+    )
+    assert rule_parse.params == {
+        "price_smaller_than": 1000.0,
+        "review_rating_bigger_than": 4.5,
+        "filter_by_type": ["Entire home/apt"],
+    }
+    assert rule_parse.residual == "in sodermalm with and"
+    assert rule_parse.confidence == 1.0
+
+
+@pytest.mark.parametrize(
+    ("natural_query", "price"),
+    [
+        ("cozy loft under $100", 100.0),
+        ("cozy loft below 900 sek", 900.0),
+        ("hotel room under 200 euros", 200.0),
+        ("costs at most 80 per night", 80.0),
+        ("price < 500 kronor", 500.0),
+    ],
+)
+def test_reads_prices(natural_query, price):
+    rule_parse = nlq_rules.parse(natural_query, PARAMS)
+    assert rule_parse.params["price_smaller_than"] == price
+    assert not any(currency in rule_parse.residual.split() for currency in ("os", "onor", "sek", "$"))
+
+
+def test_only_reads_the_given_params():
+    rule_parse = nlq_rules.parse("private room under $100", ["filter_by_type"])
+    assert rule_parse.params == {"filter_by_type": ["Private room"]}
+    assert rule_parse.confidence < 1.0
+
+
+def test_ignores_ratings_above_five():
+    assert "review_rating_bigger_than" not in nlq_rules.parse("rating above 80", PARAMS).params
+
+
+def test_query_without_filters_has_no_confidence():
+    rule_parse = nlq_rules.parse("quiet place with a balcony", PARAMS)
+    assert rule_parse.params == {}
+    assert rule_parse.confidence == 0.0
+
+
+@pytest.mark.parametrize(
+    "natural_query",
+    [
+        "no hotels please, price lower than 300",
+        "not a hotel, price under 500 sek",
+        "places near hotel rooms district",
+        "hotels in the old town",
+    ],
+)
+def test_a_bare_hotel_is_not_a_hotel_room(natural_query):
+    rule_parse = nlq_rules.parse(natural_query, PARAMS)
+    assert "filter_by_type" not in rule_parse.params
+    assert rule_parse.confidence < 1.0
+
+
+@pytest.mark.parametrize(
+    "natural_query",
+    [
+        "no shared rooms, under $100",
+        "without a private room",
+        "i don't want a private room",
+        "anything except hotel rooms",
+        "private room not under 300 sek",
+        "close to shared rooms",
+    ],
+)
+def test_negated_filters_are_left_to_the_llm(natural_query):
+    rule_parse = nlq_rules.parse(natural_query, PARAMS)
+    assert rule_parse.confidence == 0.0
+    assert rule_parse.residual
+
+
+def test_negation_in_another_clause_does_not_count():
+    rule_parse = nlq_rules.parse("not too noisy, entire home under $150", PARAMS)
+    assert rule_parse.params == {"price_smaller_than": 150.0, "filter_by_type": ["Entire home/apt"]}
+    assert rule_parse.confidence == 1.0
@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("superlinked")
+
+from starlette.requests import Request  # noqa: E402
+
+from superlinked_app import response_cache  # noqa: E402
+from superlinked_app.response_cache import LocalResponseCache  # noqa: E402
+
+
+def test_invalidate_drops_entries_and_responses_still_in_flight():
+    cache = LocalResponseCache(max_entries=10, ttl_seconds=60)
+    started = cache.generation()
+    cache.put("key", started, b"before")
+    cache.invalidate()
+    assert cache.get("key", cache.generation()) is None
+    # A query that started before the invalidation may have read the old data.
+    cache.put("key", started, b"stale")
+    assert cache.get("key", cache.generation()) is None
+    cache.put("key", cache.generation(), b"after")
+    assert cache.get("key", cache.generation()) == b"after"
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    cache = LocalResponseCache(max_entries=10, ttl_seconds=60)
+    now = 1000.0
+    monkeypatch.setattr("superlinked_app.response_cache.time.monotonic", lambda: now)
+    cache.put("key", cache.generation(), b"body")
+    now += 59
+    assert cache.get("key", cache.generation()) == b"body"
+    now += 2
+    assert cache.get("key", cache.generation()) is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = LocalResponseCache(max_entries=2, ttl_seconds=60)
+    for key in ("a", "b"):
+        cache.put(key, cache.generation(), key.encode())
+    cache.get("a", cache.generation())
+    cache.put("c", cache.generation(), b"c")
+    assert cache.get("b", cache.generation()) is None
+    assert cache.get("a", cache.generation()) == b"a"
+
+
+def test_every_put_invalidates_even_a_failed_one(monkeypatch):
+    cache = LocalResponseCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(response_cache, "response_cache", cache)
+
+    def put(data):
+        if data == "bad":
+            raise ValueError(data)
+
+    source = SimpleNamespace(put=put)
+    response_cache.invalidate_on_put(source)
+    source.put("good")
+    assert cache.generation() == 1
+    with pytest.raises(ValueError):
+        source.put("bad")
+    assert cache.generation() == 2
+
+
+def test_response_key_fills_in_the_defaults():
+    query_name, defaults = next(iter(response_cache.DEFAULT_PARAMS.items()))
+    assert response_cache.response_key(query_name, {}) == response_cache.response_key(query_name, defaults)
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"cozy loft"', b"not json"])
+def test_a_body_that_is_not_params_goes_to_the_handler(monkeypatch, body):
+    monkeypatch.setattr(response_cache, "response_cache", LocalResponseCache(max_entries=10, ttl_seconds=60))
+    handled = []
+
+    async def query(self, request):
+        handled.append(request)
+        return SimpleNamespace(status_code=422)
+
+    monkeypatch.setattr(response_cache, "_query", query)
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    request = Request(
+        {"type": "http", "method": "POST", "path": "/api/v1/search/filter_query", "headers": []}, receive
+    )
+    response = asyncio.run(response_cache._cached_query(None, request))
+    assert response.status_code == 422
+    assert len(handled) == 1
@@ -0,0 +1,31 @@
+import pytest
+
+from tools.search_filters import filter_params
+
+
+def test_sends_the_numbers_as_floats():
+    # st.number_input returns ints for int bounds.
+    filters = filter_params(50, 300, 4, ["Private room"])
+    assert filters == {
+        "price_bigger_than": 50.0,
+        "price_smaller_than": 300.0,
+        "review_rating_bigger_than": 4.0,
+        "filter_by_type": ["Private room"],
+    }
+    assert all(isinstance(filters[name], float) for name in filters if name != "filter_by_type")
+
+
+def test_leaves_out_filters_at_their_bound():
+    assert filter_params(0, 1000, 0.0, []) == {}
+
+
+def test_filter_query_accepts_the_filters():
+    pytest.importorskip("superlinked")
+    from superlinked.framework.dsl.query.query_param_value_setter import QueryParamValueSetter
+
+    from superlinked_app import query
+
+    params = {**filter_params(50, 300, 4.5, ["Private room", "Entire home/apt"]), "limit": 10}
+    resolved = QueryParamValueSetter.set_values(query.filter_query, params)
+    # Evaluating the hard filters type checks their values against the schema fields.
+    assert len(resolved.get_hard_filters()) == 4
@@ -0,0 +1,161 @@
+"""Ingestion throughput benchmark of DataFrameParser -> airbnb_index -> vector database.
+
+Puts synthetic (or sampled) listings through the same parser, spaces and embedding prefetch the data
+loader uses, and reports rows/sec, the time spent per space, in the vector database and parsing, and
+the peak memory. The in-memory vector database is used unless --qdrant-url points at a stand-in
+Qdrant, e.g. `docker run -p 6333:6333 qdrant/qdrant`.
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+import superlinked.framework as sl
+from loguru import logger
+from superlinked.framework.online.dag.online_categorical_similarity_node import OnlineCategoricalSimilarityNode
+from superlinked.framework.online.dag.online_number_embedding_node import OnlineNumberEmbeddingNode
+from superlinked.framework.online.dag.online_text_embedding_node import OnlineTextEmbeddingNode
+from superlinked.framework.storage.in_memory.in_memory_vdb import InMemoryVDB
+from superlinked.framework.storage.qdrant.qdrant_vdb_connector import QdrantVDBConnector
+
+from superlinked_app import embedding, index, ingestion, setting
+from tools.benchmark_queries import git_commit, synthetic_listings
+
+# Seconds spent per stage, summed over the whole run. Ingestion runs on a single thread.
+stage_times: defaultdict[str, float] = defaultdict(float)
+
+SPACE_NAMES = {
+    id(space.transformation_config): name
+    for name, space in {
+        "description_space": index.description_space,
+        "amenities_space": index.amenities_space,
+        "category_space": index.category_space,
+        "review_rating_maximizer_space": index.review_rating_maximizer_space,
+        "price_minimizer_space": index.price_minimizer_space,
+    }.items()
+}
+
+
+def _timed(stage, function):
+    """Adds the duration of every call to stage_times[stage], or stage(self) for a per-instance stage."""
+
+    @wraps(function)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            stage_times[stage(self) if callable(stage) else stage] += time.perf_counter() - start
+
+    return wrapper
+
+
+def _space_name(node) -> str:
+    return "embed/" + SPACE_NAMES.get(id(node.node.transformation_config), type(node).__name__)
+
+
+def instrument() -> None:
+    sl.DataFrameParser.unmarshal = _timed("parse", sl.DataFrameParser.unmarshal)
+    embedding.TextEmbeddingPrefetcher.update = _timed("embed/text_prefetch", embedding.TextEmbeddingPrefetcher.update)
+    # Only the embedding itself: the parents of a node are evaluated inside evaluate_self too.
+    OnlineTextEmbeddingNode._OnlineTextEmbeddingNode__embed_texts = _timed(
+        _space_name, OnlineTextEmbeddingNode._OnlineTextEmbeddingNode__embed_texts
+    )
+    OnlineNumberEmbeddingNode.evaluate_self = _timed(_space_name, OnlineNumberEmbeddingNode.evaluate_self)
+    OnlineCategoricalSimilarityNode.evaluate_self = _timed(_space_name, OnlineCategoricalSimilarityNode.evaluate_self)
+    for connector in (InMemoryVDB, QdrantVDBConnector):
+        connector.read_entities = _timed("vdb/read", connector.read_entities)
+        connector.write_entities = _timed("vdb/upsert", connector.write_entities)
+
+
+def create_source(prefetch: bool, qdrant_url: str | None) -> sl.InMemorySource:
+    source = sl.InMemorySource(
+        index.airbnb,
+        parser=sl.DataFrameParser(schema=index.airbnb, mapping={index.airbnb.id: "id"}),
+    )
+    if prefetch:
+        source.register(embedding.TextEmbeddingPrefetcher([index.description_space, index.amenities_space]))
+    vector_database = (
+        sl.QdrantVectorDatabase(qdrant_url, setting.QDRANT_API_KEY.get_secret_value())
+        if qdrant_url
+        else sl.InMemoryVectorDatabase()
+    )
+    sl.InteractiveExecutor(sources=[source], indices=[index.airbnb_index], vector_database=vector_database).run()
+    return source
+
+
+def benchmark(source: sl.InMemorySource, listings, batch_size: int, profile_path: str | None) -> dict:
+    profiler = cProfile.Profile() if profile_path else None
+    rss_before = ingestion.current_rss_mb()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    for batch_start in range(0, len(listings), batch_size):
+        source.put([listings.iloc[batch_start : batch_start + batch_size]])
+    if profiler is not None:
+        profiler.disable()
+    elapsed_s = time.perf_counter() - start
+
+    if profiler is not None:
+        profiler.dump_stats(profile_path)
+        logger.info("Wrote profile to {}, e.g. `snakeviz {}`", profile_path, profile_path)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+    embed_s = sum(seconds for stage, seconds in stage_times.items() if stage.startswith("embed/"))
+    return {
+        "rows": len(listings),
+        "seconds": elapsed_s,
+        "rows_per_sec": len(listings) / elapsed_s if elapsed_s else 0.0,
+        "stage_seconds": dict(sorted(stage_times.items())),
+        "embed_seconds": embed_s,
+        "other_seconds": max(elapsed_s - sum(stage_times.values()), 0.0),
+        "peak_rss_mb": ingestion.peak_rss_mb(),
+        "rss_growth_mb": ingestion.current_rss_mb() - rss_before,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="number of listings to ingest")
+    parser.add_argument("--sample", action="store_true", help="sample DATA_PATH instead of generating listings")
+    parser.add_argument("--batch-size", type=int, default=setting.INGESTION_BATCH_SIZE)
+    parser.add_argument("--no-prefetch", action="store_true", help="let every text space embed on its own")
+    parser.add_argument("--qdrant-url", help="ingest into this Qdrant instead of the in-memory database")
+    parser.add_argument("--profile", help="write a cProfile dump of the ingestion here")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    listings = (
+        ingestion.read_sample(setting.DATA_PATH, args.rows) if args.sample else synthetic_listings(args.rows, args.seed)
+    )
+    instrument()
+    source = create_source(not args.no_prefetch, args.qdrant_url)
+    results = benchmark(source, listings, args.batch_size, args.profile)
+    report = {
+        "benchmark": "ingestion",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rows": len(listings),
+            "synthetic": not args.sample,
+            "batch_size": args.batch_size,
+            "prefetch": not args.no_prefetch,
+            "vector_database": "qdrant" if args.qdrant_url else "in_memory",
+            "embedding_store": setting.EMBEDDING_STORE_PATH is not None,
+            "embedding_workers": setting.EMBEDDING_WORKERS,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
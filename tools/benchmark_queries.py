@@ -0,0 +1,247 @@
+"""End-to-end latency benchmark of the three RestQuery queries on an in-memory vector database.
+
+Listings are sampled from DATA_PATH or generated, loaded into an InMemoryExecutor, and then
+filter_query, base_query and semantic_search_query are driven from a thread pool. Run it with
+NLQ_BACKEND=replay to keep OpenAI latency out of the numbers.
+
+The cold pass sends every natural query once to every endpoint with empty natural query and query
+embedding caches, so nl_parse measures the rules and the LLM. The warm passes that follow are served
+from those caches.
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import superlinked.framework as sl
+from loguru import logger
+from superlinked.framework.dsl.executor.query.query_executor import QueryExecutor
+
+from superlinked_app import batch_search, embedding, index, ingestion, nlq, query, setting
+from superlinked_app.nlq_cache import NLQueryCache
+from superlinked_app.query_embedding_cache import QueryEmbeddingCache
+
+QUERIES = query.queries_by_name
+NATURAL_QUERIES = [
+    "entire apartment in sodermalm with price lower than 1000 and rating bigger than 4.5",
+    "private room near the old town with a view",
+    "affordable homes under $100 per night",
+    "top-rated places with pool and wifi",
+    "quiet family house with a garden and free parking",
+    "cozy studio close to the central station with a dishwasher",
+    "hotel room with breakfast and rating bigger than 4.8",
+    "shared room for a backpacker on a budget",
+]
+STAGES = ["nl_parse", "query_embedding", "vector_search", "serialization"]
+DESCRIPTION_WORDS = (
+    "cozy bright spacious modern quiet charming apartment studio house room loft view balcony garden "
+    "central station old town sodermalm ostermalm lake sea park family friendly renovated kitchen"
+).split()
+AMENITIES = (
+    "Wifi Kitchen Washer Dryer Dishwasher Elevator Balcony Pool Gym Sauna Free parking Breakfast "
+    "Heating Air conditioning TV Workspace Coffee maker"
+).split(" ")
+
+_stage_times = threading.local()
+
+
+def _timed(stage: str, function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            times = getattr(_stage_times, "current", None)
+            if times is not None:
+                times[stage] += time.perf_counter() - start
+
+    return wrapper
+
+
+def instrument() -> None:
+    nlq.CachedNLQParamEvaluator.evaluate_param_infos = _timed(
+        "nl_parse", nlq.CachedNLQParamEvaluator.evaluate_param_infos
+    )
+    QueryExecutor._produce_query_vector = _timed("query_embedding", QueryExecutor._produce_query_vector)
+    QueryExecutor._knn_search = _timed("vector_search", QueryExecutor._knn_search)
+    QueryExecutor._map_entities_to_result_entries = _timed(
+        "vector_search", QueryExecutor._map_entities_to_result_entries
+    )
+
+
+def synthetic_listings(rows: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    room_types = index.category_space.transformation_config.embedding_config.categories
+    return pd.DataFrame(
+        {
+            "id": [str(listing_id) for listing_id in range(rows)],
+            "name": [" ".join(rng.sample(DESCRIPTION_WORDS, 3)) for _ in range(rows)],
+            "description": [" ".join(rng.choices(DESCRIPTION_WORDS, k=30)) for _ in range(rows)],
+            "bedrooms": [float(rng.randint(1, 5)) for _ in range(rows)],
+            "beds": [float(rng.randint(1, 6)) for _ in range(rows)],
+            "bathrooms": [float(rng.randint(1, 3)) for _ in range(rows)],
+            "bathrooms_text": [f"{rng.randint(1, 3)} baths" for _ in range(rows)],
+            "review_scores_rating": [round(rng.uniform(3.0, 5.0), 2) for _ in range(rows)],
+            "host_is_superhost": [rng.randint(0, 1) for _ in range(rows)],
+            "price": [float(rng.randint(300, 5000)) for _ in range(rows)],
+            "amenities": [json.dumps(rng.sample(AMENITIES, 8)) for _ in range(rows)],
+            "number_of_reviews": [rng.randint(0, 500) for _ in range(rows)],
+            "room_type": [rng.choice(room_types) for _ in range(rows)],
+            "listing_url": [f"https://www.airbnb.com/rooms/{listing_id}" for listing_id in range(rows)],
+        }
+    )
+
+
+def load_app(listings: pd.DataFrame):
+    source = sl.InMemorySource(
+        index.airbnb,
+        parser=sl.DataFrameParser(schema=index.airbnb, mapping={index.airbnb.id: "id"}),
+    )
+    source.register(embedding.TextEmbeddingPrefetcher([index.description_space, index.amenities_space]))
+    app = sl.InMemoryExecutor(sources=[source], indices=[index.airbnb_index]).run()
+    start = time.perf_counter()
+    for chunk_start in range(0, len(listings), setting.INGESTION_BATCH_SIZE):
+        source.put([listings.iloc[chunk_start : chunk_start + setting.INGESTION_BATCH_SIZE]])
+    logger.info("Loaded {} listings in {:.1f}s", len(listings), time.perf_counter() - start)
+    return app
+
+
+def run_query(app, query_name: str, natural_query: str, limit: int) -> dict[str, float]:
+    _stage_times.current = defaultdict(float)
+    token = nlq.current_query_name.set(query_name)
+    start = time.perf_counter()
+    try:
+        result = app.query(QUERIES[query_name], natural_query=natural_query, limit=limit)
+        serialization_start = time.perf_counter()
+        json.dumps(batch_search.serialize(result), default=str)
+        _stage_times.current["serialization"] += time.perf_counter() - serialization_start
+    finally:
+        nlq.current_query_name.reset(token)
+    timings = dict(_stage_times.current)
+    timings["total"] = time.perf_counter() - start
+    _stage_times.current = None
+    return timings
+
+
+def summarize(timings: list[dict[str, float]], wall_time_s: float) -> dict:
+    totals_ms = np.array([timing["total"] for timing in timings]) * 1000
+    return {
+        "queries": len(timings),
+        "qps": len(timings) / wall_time_s if wall_time_s else 0.0,
+        "latency_ms": {
+            "mean": float(totals_ms.mean()),
+            "p50": float(np.percentile(totals_ms, 50)),
+            "p95": float(np.percentile(totals_ms, 95)),
+            "p99": float(np.percentile(totals_ms, 99)),
+            "max": float(totals_ms.max()),
+        },
+        "stage_mean_ms": {
+            stage: float(np.mean([timing.get(stage, 0.0) for timing in timings]) * 1000) for stage in STAGES
+        },
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_pass(app, workload: list[tuple[str, str]], concurrency: int, limit: int) -> dict:
+    timings_by_query: dict[str, list[dict[str, float]]] = defaultdict(list)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            (query_name, pool.submit(run_query, app, query_name, natural_query, limit))
+            for query_name, natural_query in workload
+        ]
+        for query_name, future in futures:
+            timings_by_query[query_name].append(future.result())
+    wall_time_s = time.perf_counter() - start
+
+    report = {query_name: summarize(timings, wall_time_s) for query_name, timings in timings_by_query.items()}
+    report["all"] = summarize([timing for timings in timings_by_query.values() for timing in timings], wall_time_s)
+    return report
+
+
+def benchmark(app, natural_queries: list[str], iterations: int, concurrency: int, limit: int) -> dict:
+    # Load the model the same way for every run.
+    for query_name in QUERIES:
+        run_query(app, query_name, natural_queries[0], limit)
+    # The warm-up filled the caches, the cold pass starts from empty ones.
+    nlq.nlq_cache = NLQueryCache(setting.NLQ_CACHE_SIZE, setting.NLQ_CACHE_TTL_SECONDS)
+    embedding.query_embedding_cache = QueryEmbeddingCache(setting.QUERY_EMBEDDING_CACHE_SIZE)
+
+    workload = [(query_name, natural_query) for query_name in QUERIES for natural_query in natural_queries]
+    return {
+        "cold": run_pass(app, workload, concurrency, limit),
+        "warm": run_pass(app, workload * iterations, concurrency, limit),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="number of listings to load")
+    parser.add_argument("--synthetic", action="store_true", help="generate listings instead of sampling DATA_PATH")
+    parser.add_argument("--queries", help="JSONL file with a natural_query per line, e.g. NLQ recordings")
+    parser.add_argument("--iterations", type=int, default=5, help="times every query runs on every endpoint after the cold pass")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as queries_file:
+            natural_queries = list(
+                dict.fromkeys(json.loads(line)["natural_query"] for line in queries_file if line.strip())
+            )
+    else:
+        natural_queries = NATURAL_QUERIES
+    listings = (
+        synthetic_listings(args.rows, args.seed)
+        if args.synthetic
+        else ingestion.read_sample(setting.DATA_PATH, args.rows)
+    )
+
+    instrument()
+    app = load_app(listings)
+    results = benchmark(app, natural_queries, args.iterations, args.concurrency, args.limit)
+    report = {
+        "benchmark": "query_latency",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rows": len(listings),
+            "synthetic": args.synthetic,
+            "natural_queries": len(natural_queries),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "limit": args.limit,
+            "nlq_backend": setting.NLQ_BACKEND,
+        },
+        "results": results,
+        "caches": {
+            "natural_query": nlq.nlq_cache.stats(),
+            "query_embedding": embedding.query_embedding_cache.stats(),
+        },
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
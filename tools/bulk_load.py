@@ -0,0 +1,27 @@
+"""Full reload of DATA_PATH into a fresh Qdrant collection behind the QDRANT_COLLECTION_NAME alias.
+
+Embeds in process like the data loader does, so run it where the model fits, not through the server.
+"""
+
+import argparse
+
+from superlinked_app import bulk_load, setting
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-path", default=setting.DATA_PATH)
+    parser.add_argument("--batch-size", type=int, default=setting.INGESTION_BATCH_SIZE)
+    parser.add_argument(
+        "--smoke-test-queries",
+        type=int,
+        default=setting.QDRANT_SMOKE_TEST_QUERIES,
+        help="recent queries from QUERY_LOG_PATH to replay as a smoke test of the new collection before the swap",
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=setting.QDRANT_KEEP_COLLECTIONS,
+        help="older collections to keep for rollback after the swap",
+    )
+    args = parser.parse_args()
+    bulk_load.bulk_load(args.data_path, args.batch_size, args.smoke_test_queries, args.keep)
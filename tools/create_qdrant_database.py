@@ -1,9 +1,6 @@
-from urllib.parse import urlparse, urlunparse
 from loguru import logger
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
 
-from superlinked_app import setting
+from superlinked_app import qdrant, setting
 
 
 assert (
@@ -13,22 +10,14 @@ assert (
     setting.QDRANT_COLLECTION_NAME
     ), "QDRANT_COLLECTION_NAME must be set in the environment variables"
 
-logger.info("Connecting to Qdrant cluster: %s", setting.QDRANT_CLUSTER_URL)
+logger.info("Connecting to Qdrant cluster: %s", setting.QDRANT_LOCAL_PATH or setting.QDRANT_CLUSTER_URL)
 
-client = QdrantClient(
-    url=setting.QDRANT_CLUSTER_URL.get_secret_value(),
-    api_key=setting.QDRANT_API_KEY.get_secret_value(),
-    #vectors_config=VectorParams(size=768, distance=Distance.Cosine),
-)
-
-def create_database(collection_name: str, vector_size: int = 768):
-    logger.info("Creating collection: %s", collection_name)
+def create_database(collection_name: str):
+    """Create the collection airbnb_index is written to behind the collection_name alias, or update its
+    HNSW, on-disk and quantization settings. Safe to run again."""
     try:
-        client.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
-        )
-        logger.info("Collection created: %s", collection_name)
+        collection = qdrant.provision_alias(qdrant.create_client(), collection_name, qdrant.vectors_config())
+        logger.info("Collection ready: {} -> {}", collection_name, collection)
         return True
     except Exception as e:
         logger.exception("An exception occurred: %s", e)
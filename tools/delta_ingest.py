@@ -0,0 +1,84 @@
+"""Send only new or changed listings to a running Superlinked server and drop the ones that are gone.
+
+Every run compares the listings in DATA_PATH against the fingerprints recorded by the previous run.
+Changed rows go through the airbnb_source REST endpoint, so they are embedded and upserted exactly like
+rows from the data loader. After a full `make load-data`, run once with --record-only to seed the store.
+"""
+
+import argparse
+import json
+import time
+
+import requests
+from loguru import logger
+
+from superlinked_app import delta, setting
+
+INGEST_ENDPOINT = "/api/v1/ingest/data_schema"
+
+
+def ingest(session: requests.Session, api_url: str, listings) -> None:
+    # to_json writes NaN as null, which the JSON parser treats as a missing value.
+    payload = json.loads(listings.to_json(orient="records"))
+    response = session.post(f"{api_url}{INGEST_ENDPOINT}", json=payload, timeout=None)
+    response.raise_for_status()
+
+
+def run(api_url: str, batch_size: int, record_only: bool) -> None:
+    store = delta.FingerprintStore(setting.DELTA_FINGERPRINT_PATH)
+    previous = store.load()
+    logger.info("Loaded {} fingerprints from {}", len(previous), setting.DELTA_FINGERPRINT_PATH)
+
+    seen: set[str] = set()
+    rows = changed_rows = 0
+    start = time.perf_counter()
+    with requests.Session() as session:
+        for listings in delta.read_listings(setting.DATA_PATH, batch_size):
+            fingerprints = delta.fingerprint(listings)
+            # A listing that appears twice in the file is sent once, with its last version.
+            fingerprints = fingerprints[~fingerprints.index.duplicated(keep="last")]
+            seen.update(fingerprints.index)
+            rows += len(fingerprints)
+            changed = fingerprints[[previous.get(id_) != value for id_, value in fingerprints.items()]]
+            if changed.empty:
+                continue
+            if not record_only:
+                changed_listings = listings[listings["id"].isin(changed.index)]
+                ingest(session, api_url, changed_listings.drop_duplicates("id", keep="last"))
+            store.upsert(changed)
+            changed_rows += len(changed)
+            logger.info("{} of {} listings new or changed so far", changed_rows, rows)
+
+    removed = [id_ for id_ in previous if id_ not in seen]
+    if removed and not record_only:
+        if not setting.USE_QDRANT_VECTOR_DB:
+            logger.warning("Cannot delete {} removed listings from the in-memory database", len(removed))
+            removed = []
+        else:
+            from superlinked_app import qdrant, response_cache
+
+            qdrant.delete_listings(qdrant.create_client(), removed)
+            # The server only sees the upserts, which go through its ingest endpoint.
+            response_cache.invalidate_server(api_url)
+    store.delete(removed)
+
+    logger.info(
+        "Delta ingestion done in {:.1f}s: {} listings, {} new or changed, {} removed",
+        time.perf_counter() - start,
+        rows,
+        changed_rows,
+        len(removed),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--api-url", default=setting.SUPERLINKED_API_URL)
+    parser.add_argument("--batch-size", type=int, default=setting.INGESTION_BATCH_SIZE)
+    parser.add_argument(
+        "--record-only",
+        action="store_true",
+        help="only record fingerprints, e.g. right after a full load",
+    )
+    args = parser.parse_args()
+    run(args.api_url, args.batch_size, args.record_only)
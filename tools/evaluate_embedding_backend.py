@@ -0,0 +1,115 @@
+"""Top-k agreement of an EMBEDDING_BACKEND with the fp32 model on a sample of listings.
+
+Embeds the texts of the sampled listings and a set of natural queries with the fp32 torch model and
+with the backend under test. For every text space it reports the share of the fp32 top-k listings of a
+query the backend also ranks in its top k, how close the vectors of the two are, and how many texts
+per second each embeds on this machine.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from superlinked.framework.common.space.embedding.sentence_transformer_manager import SentenceTransformerManager
+from superlinked.framework.common.util.gpu_embedding_util import CPU_DEVICE_TYPE
+
+from superlinked_app import embedding_backend, index, ingestion, setting
+from tools.benchmark_queries import NATURAL_QUERIES, git_commit
+
+SPACES = {"description_space": index.description_space, "amenities_space": index.amenities_space}
+
+
+def embed(model, texts: list[str], batch_size: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - start
+
+
+def top_k(queries: np.ndarray, documents: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(queries @ documents.T), axis=1)[:, :k]
+
+
+def evaluate_space(space, listings, natural_queries: list[str], backend: str, k: int, batch_size: int) -> dict:
+    model_name = space.transformation_config.embedding_config.model_name
+    model_cache_dir = SentenceTransformerManager(model_name)._model_cache_dir
+    documents = [
+        " ".join(str(listings.at[row, field.name]) for field in space.text.fields) for row in listings.index
+    ]
+    results = {}
+    for name in ("torch", backend):
+        model = embedding_backend.load_model(model_name, name, model_cache_dir, CPU_DEVICE_TYPE)
+        # Warm the model up so loading and the first batch don't count towards the throughput.
+        model.encode(documents[:batch_size], batch_size=batch_size)
+        document_vectors, seconds = embed(model, documents, batch_size)
+        query_vectors, _ = embed(model, natural_queries, batch_size)
+        results[name] = (document_vectors, query_vectors, len(documents) / seconds)
+
+    baseline_documents, baseline_queries, baseline_rate = results["torch"]
+    backend_documents, backend_queries, backend_rate = results[backend]
+    baseline_top_k = top_k(baseline_queries, baseline_documents, k)
+    backend_top_k = top_k(backend_queries, backend_documents, k)
+    overlaps = np.array(
+        [len(set(expected) & set(found)) / k for expected, found in zip(baseline_top_k, backend_top_k)]
+    )
+    return {
+        "model": model_name,
+        f"overlap_at_{k}": float(overlaps.mean()),
+        f"min_overlap_at_{k}": float(overlaps.min()),
+        "mean_document_cosine": float(np.mean(np.sum(baseline_documents * backend_documents, axis=1))),
+        "mean_query_cosine": float(np.mean(np.sum(baseline_queries * backend_queries, axis=1))),
+        "torch_texts_per_sec": baseline_rate,
+        f"{backend}_texts_per_sec": backend_rate,
+        "speedup": backend_rate / baseline_rate,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["int8", "onnx"], default="int8")
+    parser.add_argument("--rows", type=int, default=2000, help="number of listings to sample from DATA_PATH")
+    parser.add_argument("--queries", help="JSONL file with a natural_query per line, e.g. NLQ recordings")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-overlap", type=float, help="exit with an error if a space agrees less than this")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as queries_file:
+            natural_queries = list(
+                dict.fromkeys(json.loads(line)["natural_query"] for line in queries_file if line.strip())
+            )
+    else:
+        natural_queries = NATURAL_QUERIES
+    listings = ingestion.read_sample(setting.DATA_PATH, args.rows).reset_index(drop=True)
+
+    results = {
+        space_name: evaluate_space(space, listings, natural_queries, args.backend, args.k, args.batch_size)
+        for space_name, space in SPACES.items()
+    }
+    report = {
+        "benchmark": "embedding_backend",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "backend": args.backend,
+            "onnx_file": setting.EMBEDDING_ONNX_FILE if args.backend == "onnx" else None,
+            "rows": len(listings),
+            "natural_queries": len(natural_queries),
+            "k": args.k,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    if args.min_overlap is not None and any(
+        result[f"overlap_at_{args.k}"] < args.min_overlap for result in results.values()
+    ):
+        sys.exit(1)
@@ -0,0 +1,58 @@
+"""Compare the local natural query rules against parameters the LLM extracted for the same queries.
+
+The corpus is a JSONL file with one {"natural_query": ..., "params": {...}} object per line.
+"""
+
+import argparse
+import json
+from collections import Counter
+
+from loguru import logger
+
+from superlinked_app import nlq_rules
+
+RULE_PARAMS = ["price_smaller_than", "review_rating_bigger_than", "filter_by_type"]
+
+
+def evaluate(corpus_path: str, min_confidence: float) -> dict[str, float]:
+    counts: Counter[str] = Counter()
+    with open(corpus_path, encoding="utf-8") as corpus:
+        for line in corpus:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            expected = record["params"]
+            rule_parse = nlq_rules.parse(record["natural_query"], RULE_PARAMS)
+            counts["queries"] += 1
+            if rule_parse.confidence < min_confidence:
+                continue
+            counts["confident"] += 1
+            counts["without_llm"] += not rule_parse.residual
+            for name in RULE_PARAMS:
+                if name not in rule_parse.params:
+                    continue
+                counts["extracted"] += 1
+                if rule_parse.params[name] == expected.get(name):
+                    counts["agreed"] += 1
+                else:
+                    logger.info(
+                        "{!r}: rules read {}={!r}, LLM {!r}",
+                        record["natural_query"],
+                        name,
+                        rule_parse.params[name],
+                        expected.get(name),
+                    )
+    return {
+        "queries": counts["queries"],
+        "confident_share": counts["confident"] / counts["queries"] if counts["queries"] else 0.0,
+        "without_llm_share": counts["without_llm"] / counts["queries"] if counts["queries"] else 0.0,
+        "param_agreement": counts["agreed"] / counts["extracted"] if counts["extracted"] else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="JSONL file of natural queries and the parameters the LLM extracted")
+    parser.add_argument("--min-confidence", type=float, default=1.0)
+    args = parser.parse_args()
+    print(json.dumps(evaluate(args.corpus, args.min_confidence), indent=2))
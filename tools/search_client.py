@@ -0,0 +1,93 @@
+"""HTTP client of the Streamlit frontends for the search API.
+
+Requests go through one keep-alive requests.Session per Streamlit server, and responses are memoized
+per endpoint and parameters, so a rerun caused by a click in the UI doesn't reach the backend again.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib3.util.retry import Retry
+
+API_URL = "http://0.0.0.0:8080/api/v1/search/filter_query"
+DEFAULT_TIMEOUT = 10  # seconds
+
+# Connections kept open to the search API, shared by every browser session.
+POOL_SIZE = 16
+# A response is reused for this long, the server drops its own cached responses when data changes.
+RESULT_TTL_SECONDS = 300
+RESULT_CACHE_SIZE = 256
+
+
+class SearchError(Exception):
+    """A search that failed, with a message to show in the UI."""
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    session = requests.Session()
+    # Searches don't change anything, so a POST that hit a restarting server can be sent again.
+    retries = Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504], allowed_methods=["POST"])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"accept": "application/json", "Content-Type": "application/json"})
+    return session
+
+
+@st.cache_data(ttl=RESULT_TTL_SECONDS, max_entries=RESULT_CACHE_SIZE, show_spinner=False)
+def search(api_url: str, params: dict, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """The response of the query endpoint at api_url to params.
+
+    Failed searches raise SearchError and are not memoized.
+    """
+    try:
+        response = get_session().post(api_url, json=params, timeout=timeout)
+    except requests.exceptions.Timeout:
+        raise SearchError(f"Request timed out after {timeout} seconds. The server might be overloaded.")
+    except requests.exceptions.ConnectionError:
+        raise SearchError("Connection error. Please check if the API server is running.")
+    except requests.exceptions.RequestException as e:
+        raise SearchError(f"Request failed: {e}")
+
+    if response.status_code == 404:
+        raise SearchError("API endpoint not found. Please check if the service is running.")
+    if response.status_code == 400:
+        raise SearchError(f"Bad request: {response.json().get('detail', 'No details provided')}")
+    if response.status_code == 500:
+        raise SearchError("Server error. The search service might be experiencing issues.")
+    if response.status_code != 200:
+        raise SearchError(f"Request failed with status code: {response.status_code}")
+    try:
+        return response.json()
+    except json.JSONDecodeError:
+        raise SearchError("Failed to parse API response. The server returned an invalid JSON.")
+
+
+def search_many(
+    api_url: str, params_list: list[dict], timeout: float = DEFAULT_TIMEOUT, max_workers: int = 8
+) -> list[dict | SearchError]:
+    """The responses to several searches, sent concurrently over the pooled session.
+
+    Results come back in the order of params_list, a failed search as its SearchError. Searches that
+    are already memoized don't reach the backend.
+    """
+    # The worker threads need the script context to read and fill the cache of this session.
+    ctx = get_script_run_ctx()
+
+    def attach_ctx() -> None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    def run(params: dict) -> dict | SearchError:
+        try:
+            return search(api_url, params, timeout)
+        except SearchError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, POOL_SIZE), initializer=attach_ctx) as executor:
+        return list(executor.map(run, params_list))
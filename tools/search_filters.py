@@ -0,0 +1,19 @@
+"""The sidebar filters of the Streamlit UI as filter_query parameters."""
+
+
+def filter_params(min_price: float, max_price: float, min_rating: float, room_types: list[str]) -> dict:
+    """The filters that narrow the search, leaving out the ones still at their widget's bound.
+
+    Superlinked type checks hard filter values against the schema field without coercing them, so a
+    price given as an int fails on the Float price field. The numbers are sent as floats.
+    """
+    filters = {}
+    if min_price > 0:
+        filters["price_bigger_than"] = float(min_price)
+    if max_price < 1000:
+        filters["price_smaller_than"] = float(max_price)
+    if min_rating > 0:
+        filters["review_rating_bigger_than"] = float(min_rating)
+    if room_types:
+        filters["filter_by_type"] = list(room_types)
+    return filters
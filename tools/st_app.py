@@ -1,4 +1,3 @@
-import requests
 import streamlit as st
 import pandas as pd
 import json
@@ -6,6 +5,9 @@ import time
 from datetime import datetime
 import numpy as np
 
+from search_client import API_URL, DEFAULT_TIMEOUT, SearchError, search
+from search_filters import filter_params
+
 # Configure page
 st.set_page_config(
     page_title="Airbnb Semantic Search",
@@ -77,10 +79,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Constants
-API_URL = "http://0.0.0.0:8080/api/v1/search/filter_query"
-DEFAULT_TIMEOUT = 10  # seconds
-
 # Session state initialization
 if 'search_history' not in st.session_state:
     st.session_state.search_history = []
@@ -91,44 +89,23 @@ if 'last_query' not in st.session_state:
 if 'last_results' not in st.session_state:
     st.session_state.last_results = None
 
-def make_filter_query(query: str, limit: int = 10, timeout: int = DEFAULT_TIMEOUT) -> dict | None:
-    """Make a request to the semantic search API with error handling and timeout"""
-    headers = {"accept": "application/json", "Content-Type": "application/json"}
-    data = {"natural_query": query}
+def make_filter_query(
+    query: str, filters: dict, limit: int = 10, api_url: str = API_URL, timeout: int = DEFAULT_TIMEOUT
+) -> dict | None:
+    """Make a request to the semantic search API, showing what went wrong if it fails.
+
+    The filters are sent as parameters of filter_query, so the LLM only reads the free text. Without
+    a query the LLM isn't called at all. Repeating a search within a few minutes reuses the response.
+    """
+    params = {**filters, "limit": limit}
+    if query:
+        params["natural_query"] = query
     
     try:
         with st.spinner("🔍 Searching..."):
-            response = requests.post(
-                API_URL, 
-                headers=headers, 
-                json=data,
-                timeout=timeout
-            )
-        
-        # Handle different status codes
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 404:
-            st.error("API endpoint not found. Please check if the service is running.")
-        elif response.status_code == 400:
-            st.error(f"Bad request: {response.json().get('detail', 'No details provided')}")
-        elif response.status_code == 500:
-            st.error("Server error. The search service might be experiencing issues.")
-        else:
-            st.error(f"Request failed with status code: {response.status_code}")
-            
-        return None
-    except requests.exceptions.Timeout:
-        st.error(f"Request timed out after {timeout} seconds. The server might be overloaded.")
-        return None
-    except requests.exceptions.ConnectionError:
-        st.error("Connection error. Please check if the API server is running.")
-        return None
-    except requests.exceptions.RequestException as e:
-        st.error(f"Request failed: {str(e)}")
-        return None
-    except json.JSONDecodeError:
-        st.error("Failed to parse API response. The server returned an invalid JSON.")
+            return search(api_url, params, timeout)
+    except SearchError as e:
+        st.error(str(e))
         return None
 
 def display_listing(listing, idx):
@@ -454,105 +431,93 @@ def main():
     with col3:
         search_button = st.button("🔍 Search", use_container_width=True, type="primary")
     
+    # Filters are passed as filter_query parameters, a room type among any of the selected ones matches
+    filters = filter_params(min_price, max_price, min_rating, room_types)
+
     # Execute search
-    if search_button and query:
+    if search_button and (query or filters):
         st.session_state.last_query = query
         
-        # Prepare search query with filters
-        enhanced_query = query
-        filter_additions = []
-        
-        if min_price > 0:
-            filter_additions.append(f"price greater than {min_price}")
-        if max_price < 1000:
-            filter_additions.append(f"price less than {max_price}")
-        if min_rating > 0:
-            filter_additions.append(f"rating above {min_rating}")
-        if room_types:
-            room_type_str = " or ".join(room_types)
-            filter_additions.append(f"room type is {room_type_str}")
-            
-        if filter_additions:
-            filter_str = " and ".join(filter_additions)
-            enhanced_query = f"{query} with {filter_str}"
-            
         # Make the search request
-        response = make_filter_query(enhanced_query, limit=limit, timeout=timeout)
+        response = make_filter_query(query, filters, limit=limit, api_url=api_url, timeout=timeout)
         
         if response and "results" in response:
-            results = response["results"]
-            st.session_state.last_results = results
-            result_count = len(results)
+            st.session_state.last_results = response["results"]
             
             # Add to search history
-            add_to_search_history(query, result_count)
-            
-            # Display results summary
-            st.markdown(f"### 🔍 Found {result_count} listings matching your search")
-            
-            # Create dataframe for analytics
-            results_df = create_listing_dataframe(results)
-            
-            # Display analytics
-            if results_df is not None:
-                display_analytics(results_df)
-            
-            # Display results
-            st.markdown("### 📋 Search Results")
-            
-            # Create sorting options
-            sort_col1, sort_col2 = st.columns([1, 3])
-            with sort_col1:
-                st.write("Sort by:")
-            with sort_col2:
-                sort_option = st.selectbox(
-                    "",
-                    ["Relevance", "Price (low to high)", "Price (high to low)", "Rating (high to low)"],
-                    label_visibility="collapsed"
-                )
-            
-            # Sort results based on selection
-            if sort_option == "Price (low to high)" and results_df is not None:
-                sorted_indices = results_df['price'].sort_values().index
-                sorted_results = [results[i] for i in sorted_indices if i < len(results)]
-            elif sort_option == "Price (high to low)" and results_df is not None:
-                sorted_indices = results_df['price'].sort_values(ascending=False).index
-                sorted_results = [results[i] for i in sorted_indices if i < len(results)]
-            elif sort_option == "Rating (high to low)" and results_df is not None:
-                sorted_indices = results_df['review_scores_rating'].sort_values(ascending=False).index
-                sorted_results = [results[i] for i in sorted_indices if i < len(results)]
-            else:
-                sorted_results = results
-            
-            # Display listings
-            for idx, item in enumerate(sorted_results):
-                if "obj" in item:
-                    display_listing(item["obj"], idx)
-            
-            # Offer export options
-            if results_df is not None:
-                st.markdown("### 📤 Export Results")
-                col1, col2 = st.columns(2)
-                with col1:
-                    csv = results_df.to_csv(index=False)
-                    st.download_button(
-                        "Download CSV",
-                        csv,
-                        "airbnb_search_results.csv",
-                        "text/csv",
-                        key='download-csv'
-                    )
-                with col2:
-                    json_str = results_df.to_json(orient="records")
-                    st.download_button(
-                        "Download JSON",
-                        json_str,
-                        "airbnb_search_results.json",
-                        "application/json",
-                        key='download-json'
-                    )
+            add_to_search_history(query or "Filters only", len(response["results"]))
         else:
+            st.session_state.last_results = None
             st.error("No results found. Try adjusting your search query or filters.")
+    
+    # Results stay on screen across the reruns clicks cause, without searching again
+    if st.session_state.last_results is not None:
+        results = st.session_state.last_results
+        result_count = len(results)
+        # Display results summary
+        st.markdown(f"### 🔍 Found {result_count} listings matching your search")
+        
+        # Create dataframe for analytics
+        results_df = create_listing_dataframe(results)
+        
+        # Display analytics
+        if results_df is not None:
+            display_analytics(results_df)
+        
+        # Display results
+        st.markdown("### 📋 Search Results")
+        
+        # Create sorting options
+        sort_col1, sort_col2 = st.columns([1, 3])
+        with sort_col1:
+            st.write("Sort by:")
+        with sort_col2:
+            sort_option = st.selectbox(
+                "",
+                ["Relevance", "Price (low to high)", "Price (high to low)", "Rating (high to low)"],
+                label_visibility="collapsed"
+            )
+        
+        # Sort results based on selection
+        if sort_option == "Price (low to high)" and results_df is not None:
+            sorted_indices = results_df['price'].sort_values().index
+            sorted_results = [results[i] for i in sorted_indices if i < len(results)]
+        elif sort_option == "Price (high to low)" and results_df is not None:
+            sorted_indices = results_df['price'].sort_values(ascending=False).index
+            sorted_results = [results[i] for i in sorted_indices if i < len(results)]
+        elif sort_option == "Rating (high to low)" and results_df is not None:
+            sorted_indices = results_df['review_scores_rating'].sort_values(ascending=False).index
+            sorted_results = [results[i] for i in sorted_indices if i < len(results)]
+        else:
+            sorted_results = results
+        
+        # Display listings
+        for idx, item in enumerate(sorted_results):
+            if "obj" in item:
+                display_listing(item["obj"], idx)
+        
+        # Offer export options
+        if results_df is not None:
+            st.markdown("### 📤 Export Results")
+            col1, col2 = st.columns(2)
+            with col1:
+                csv = results_df.to_csv(index=False)
+                st.download_button(
+                    "Download CSV",
+                    csv,
+                    "airbnb_search_results.csv",
+                    "text/csv",
+                    key='download-csv'
+                )
+            with col2:
+                json_str = results_df.to_json(orient="records")
+                st.download_button(
+                    "Download JSON",
+                    json_str,
+                    "airbnb_search_results.json",
+                    "application/json",
+                    key='download-json'
+                )
             
     # Display detailed view of a selected listing
     if 'selected_listing' in st.session_state:
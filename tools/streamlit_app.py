@@ -1,22 +1,17 @@
-import requests
 import streamlit as st
 
+from search_client import API_URL, SearchError, search
+
 # here is the API request: curl -X 'POST' \
 #   'http://0.0.0.0:8080/api/v1/search/filter_query' \
 #   -H 'accept: application/json' \
 #   -H 'Content-Type: application/json' \
 #   -d '{"natural_query": "Find apartments with rating bigger than 4."}'
-def make_filter_query(query:str) -> dict | None:
-    url = "http://0.0.0.0:8080/api/v1/search/filter_query"
-    headers = {"accept": "application/json", "Content-Type": "application/json"}
-    data = {"natural_query": query}
-    
+def make_filter_query(query:str, limit: int = 10) -> dict | None:
     try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Request failed: {e}")
+        return search(API_URL, {"natural_query": query, "limit": limit})
+    except SearchError as e:
+        st.error(str(e))
         
         return None
     
@@ -36,7 +31,7 @@ def main():
     if st.button("Search"):
         if query:
             with st.spinner("Searching..."):
-                response = make_filter_query(query)
+                response = make_filter_query(query, limit)
                 
                 if response and "results" in response:
                     st.subheader("Search Results")